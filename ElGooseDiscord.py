@@ -1,190 +1,280 @@
+import time
+# Taken before the heavy imports so startup timings cover them
+PROCESS_START = time.monotonic()
+
 import discord
 from discord.ext import commands
 from discord import app_commands
-import aiohttp
+import asyncio
 import datetime
+import logging
 from typing import Optional
-from config import TOKEN
+from config import TOKEN, CATALOG_REFRESH_HOURS, METRICS_HOST, METRICS_PORT, LIVE_CHECKPOINT_PATH, SETLISTS_MAX_SHOWS
+from config import GAPS_MIN_PLAYS, BUSTOUT_MIN_PLAYS
 import re
 import html  # Add import for HTML entity decoding
-import traceback  # Add this at the top
 import os
 from LiveSetlist import LiveSetlist
-from exceptions import APIError
-from embeds import create_setlist_embed, create_song_embed
-from song_info import get_song_info, format_song_name
+from live_checkpoint import LiveCheckpointStore
+from show_calendar import ShowDayScheduler
+from exceptions import APIError, UpstreamUnavailableError
+from command_sync import sync_commands_if_changed
+from api_client import api_client
+from catalog import catalog
+from song_stats import song_stats
+from play_history import play_history
+from models import Show, decode_shows, decode_setlist_rows
+from song_index import song_names, refresh_song_names, rebuild_song_names
+from embeds import (
+    create_setlist_embed, create_song_embed, create_song_comparison_embed, create_onthisday_embed, create_gaps_embed,
+    create_trace_embed,
+)
+from setlist_state import IncrementalSetlist
+from setlist_pages import SetlistPager, fetch_shows_bounded, find_shows
+from song_info import get_song_info, get_songs_info, parse_song_list, format_song_name
+from log_config import configure_logging
+from metrics import metrics, timed_command, start_metrics_server
+from tracing import tracer
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Reply for requests the rate limiter or circuit breaker turned away, so they aren't mistaken for "not found"
+UPSTREAM_BUSY_MESSAGE = "elgoose.net is busy right now. Please try again in a few seconds."
+
+class ElGooseBot(commands.Bot):
+    """Bot subclass that ties the shared API client to the bot lifecycle."""
+
+    async def setup_hook(self):
+        """One-time startup work; runs before connecting, unlike on_ready which fires on every reconnect."""
+        await api_client.start()
+        await tracer.start()
+        song_stats.attach(catalog)
+        play_history.attach(catalog)
+        catalog.add_ingest_listener(lambda shows, rows: rebuild_song_names())
+        # Autocomplete works from the local index right away; the API song list is merged in when it arrives.
+        rebuild_song_names()
+        self.song_names_task = asyncio.create_task(refresh_song_names())
+        self.catalog_refresh_task = asyncio.create_task(self._refresh_catalog_loop())
+        _create_live_tracker()
+        if live_setlist_tracker:
+            # Re-attach to a show that was being tracked before a restart, without reposting.
+            self.live_resume_task = asyncio.create_task(live_setlist_tracker.resume())
+            _create_show_day_scheduler()
+            self.show_day_task = asyncio.create_task(self._run_show_day_scheduler())
+        self.metrics_runner = None
+        if METRICS_PORT:
+            try:
+                self.metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+            except OSError as e:
+                logger.error("Could not start metrics endpoint on %s:%s: %s", METRICS_HOST, METRICS_PORT, e)
+        try:
+            await sync_commands_if_changed(self.tree, self.application_id)
+        except discord.DiscordException as e:
+            logger.error("Failed to sync commands: %s", e)
+        startup_times["setup_seconds"] = time.monotonic() - PROCESS_START
+
+    async def close(self):
+        for task_name in ('catalog_refresh_task', 'song_names_task', 'live_resume_task', 'show_day_task'):
+            if getattr(self, task_name, None):
+                getattr(self, task_name).cancel()
+        if getattr(self, 'metrics_runner', None):
+            await self.metrics_runner.cleanup()
+        await api_client.close()
+        await tracer.close()
+        catalog.close()
+        if live_setlist_tracker and live_setlist_tracker.checkpoint_store:
+            live_setlist_tracker.checkpoint_store.close()
+        await super().close()
+
+    async def _run_show_day_scheduler(self):
+        # Let a resumed show re-attach first so the scheduler doesn't start it a second time.
+        try:
+            await self.live_resume_task
+        except Exception:
+            logger.exception("Live tracker resume failed")
+        await show_day_scheduler.run()
+
+    async def _refresh_catalog_loop(self):
+        """Periodically pulls newly finished shows into the local mirror."""
+        if not catalog.is_initialized:
+            logger.warning("Catalog mirror is empty; run `python catalog.py sync --full` to enable it.")
+            return
+        while True:
+            try:
+                await catalog.sync()
+            except Exception as e:
+                logger.warning("Catalog incremental refresh failed: %s", e)
+            await asyncio.sleep(CATALOG_REFRESH_HOURS * 3600)
+
 # Bot setup with all intents
 intents = discord.Intents.default()
-bot = commands.Bot(command_prefix="!", intents=intents)
-
-# API base URL
-API_BASE_URL = "https://elgoose.net/api/v2"
+bot = ElGooseBot(command_prefix="!", intents=intents)
 
 # Remove default help command to implement custom one
 bot.remove_command('help')
 
 live_setlist_tracker = None
+show_day_scheduler = None
 
-@bot.event
-async def on_ready():
+# Seconds since PROCESS_START at which each startup milestone was reached
+startup_times = {}
+metrics.register_collector("startup", lambda: dict(startup_times))
+metrics.register_collector("play_history", play_history.stats)
+metrics.register_collector("tracing", tracer.stats)
+
+def _create_live_tracker():
+    """Creates the shared live tracker. Called once from setup_hook so reconnects never orphan a running tracker."""
     global live_setlist_tracker
-    print(f'Logged in as {bot.user.name}')
+    if live_setlist_tracker is not None:
+        return
+    # CHANNEL_ID is optional: it is only used when /live can't tell which channel it was run in.
+    default_channel_id = None
+    channel_id_str = os.getenv("CHANNEL_ID")
+    if channel_id_str:
+        try:
+            default_channel_id = int(channel_id_str)
+        except ValueError:
+            logger.warning("Invalid CHANNEL_ID '%s' in environment. Must be an integer. Ignoring it.", channel_id_str)
     try:
-        synced = await bot.tree.sync()
-        print(f"Synced {len(synced)} command(s)")
+        checkpoint_store = LiveCheckpointStore(LIVE_CHECKPOINT_PATH) if LIVE_CHECKPOINT_PATH else None
+        live_setlist_tracker = LiveSetlist(bot, fetch_show_parts, default_channel_id, checkpoint_store)
+        metrics.register_collector("live", live_setlist_tracker.stats)
+        logger.info("Live setlist tracker initialized")
+    except Exception as e:
+        logger.error("Error initializing LiveSetlist: %s. Live features disabled.", e)
 
-        channel_id_str = os.getenv("CHANNEL_ID")
-        if channel_id_str:
-            try:
-                channel_id = int(channel_id_str)
-                live_setlist_tracker = LiveSetlist(bot, channel_id, fetch_show_details)
-                print(f"Live setlist tracker initialized for channel {channel_id}")
-            except ValueError:
-                print(f"Warning: Invalid CHANNEL_ID '{channel_id_str}' in environment. Must be an integer. Live features disabled.")
-            except Exception as e:
-                print(f"Error initializing LiveSetlist: {e}. Live features disabled.")
-        else:
-            print("Warning: CHANNEL_ID environment variable not set. Live features disabled.")
+def _create_show_day_scheduler():
+    """Creates the scheduler that prewarms show-day data and auto-starts the live tracker."""
+    global show_day_scheduler
+    if show_day_scheduler is not None:
+        return
+    # Prewarming goes through fetch_show_details so the same cache entries /setlist reads are filled.
+    show_day_scheduler = ShowDayScheduler(bot, live_setlist_tracker, fetch_show_details)
+    metrics.register_collector("show_day", show_day_scheduler.stats)
 
-    except Exception as e:
-        print(f"Failed to sync commands: {e}")
-
-def _process_setlist_data(base_show_data: dict, setlist_data: list) -> dict:
-    """Processes raw setlist data and merges it into the base show data."""
-    final_show_data = base_show_data.copy()
-    if not setlist_data or not isinstance(setlist_data, list):
-        return final_show_data
-
-    goose_songs = [s for s in setlist_data if s.get('artist', '').lower() == 'goose']
-    if not goose_songs:
-        return final_show_data
-
-    sets = {}
-    show_notes = None
-    coach_notes = []
-    footnote_map = {}
-    note_number = 1
-
-    for song in goose_songs:
-        if footnote := song.get('footnote'):
-            if footnote not in footnote_map:
-                footnote_map[footnote] = str(note_number)
-                coach_notes.append({"number": str(note_number), "text": footnote})
-                note_number += 1
-
-    for song in goose_songs:
-        set_key = 'Encore' if song.get('settype', '').lower() in ['encore', 'e'] or str(song.get('setnumber')).lower() == 'e' else f"Set {song.get('setnumber')}"
-        if set_key not in sets:
-            sets[set_key] = ""
-
-        song_text = song.get('songname', '')
-        if footnote := song.get('footnote'):
-            song_text += f"[{footnote_map.get(footnote, '?')}]"
-        
-        sets[set_key] += song_text + song.get('transition', '').strip() + " "
-        
-        if notes := song.get('shownotes'):
-            show_notes = notes
-
-    formatted_sets = []
-    for name, songs in sets.items():
-        cleaned_songs = songs.strip()
-        if cleaned_songs.endswith(',') or cleaned_songs.endswith('>'):
-            cleaned_songs = cleaned_songs[:-1].strip()
-        formatted_sets.append({"name": name, "songs": cleaned_songs})
-
-    final_show_data['sets'] = formatted_sets
-    if show_notes:
-        final_show_data['notes'] = show_notes
-    if coach_notes:
-        final_show_data['coach_notes'] = coach_notes
-        
-    return final_show_data
+@bot.event
+async def on_ready():
+    # Fires again after every reconnect; all one-time startup work lives in setup_hook.
+    if "ready_seconds" in startup_times:
+        logger.info("Reconnected as %s", bot.user.name)
+        return
+    startup_times["ready_seconds"] = time.monotonic() - PROCESS_START
+    logger.info("Logged in as %s (%.2fs after process start)", bot.user.name, startup_times["ready_seconds"])
 
-async def fetch_api_data(endpoint: str) -> dict:
-    """Helper function to fetch data from the API with enhanced error handling"""
-    async with aiohttp.ClientSession() as session:
-        try:
-            full_url = f"{API_BASE_URL}/{endpoint}"
-            print(f"[API Request] URL: {full_url}")
-            
-            start_time = datetime.datetime.now()
-            async with session.get(full_url) as response:
-                end_time = datetime.datetime.now()
-                response_time = (end_time - start_time).total_seconds()
-                print(f"[API Response] Time: {response_time:.2f}s")
-                print(f"[API Response] Status: {response.status}")
-                
-                if response.status == 200:
-                    try:
-                        json_data = await response.json(content_type=None)
-                        print(f"[API Response] Parsed JSON: {str(json_data)[:500]}...")
-                        
-                        if isinstance(json_data, dict) and 'error' in json_data:
-                            if json_data['error']:
-                                print(f"[API Error] API returned error message: {json_data['error_message']}")
-                                # Treat API-reported error as a failure
-                                raise APIError(f"API returned error: {json_data['error_message']}")
-                            return json_data.get('data')
-                        return json_data
-                    except Exception as e:
-                        print(f"[API Error] JSON parsing failed: {str(e)}")
-                        raise APIError("Failed to parse API response.") from e
-                else:
-                    print(f"[API Error] Non-200 status code: {response.status}")
-                    raise APIError(f"API returned status code {response.status}")
-        except aiohttp.ClientError as e:
-            print(f"[API Error] Network error: {str(e)}")
-            raise APIError(f"A network error occurred: {e}") from e
-        except Exception as e:
-            print(f"[API Error] Unexpected error in fetch_api_data: {str(e)}")
-            raise APIError(f"An unexpected error occurred: {e}") from e
-
-async def fetch_show_details(show_id: str, date: str = None) -> dict:
-    """Helper function to fetch detailed show information including setlist"""
-    try:
-        base_show_data_list = await fetch_api_data(f"shows/showdate/{date}.json")
-        if not base_show_data_list or not isinstance(base_show_data_list, list):
-            return None
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    if "first_command_seconds" not in startup_times:
+        startup_times["first_command_seconds"] = time.monotonic() - PROCESS_START
+        logger.info(
+            "First command (/%s) served %.2fs after process start", command.name, startup_times["first_command_seconds"]
+        )
 
-        final_show_data = next((show for show in base_show_data_list if show.get('artist', '').lower() == 'goose'), None)
-        if not final_show_data:
-            return None
-    except APIError as e:
-        print(f"[ShowDetails] Could not fetch base show data: {e}")
-        return None
+def _process_setlist_data(base_show: Show, setlist: list) -> Show:
+    """Processes decoded setlist rows and merges them into a copy of the base show."""
+    # Built with the live tracker's incremental state, so /setlist and live embeds can't render differently
+    state = IncrementalSetlist()
+    state.update(setlist)
+    return state.to_show(base_show)
+
+async def fetch_api_data(endpoint: str, decode=None, refresh: bool = False, live: bool = False):
+    """Helper function to fetch data from the API through the shared pooled client"""
+    return await api_client.fetch(endpoint, decode=decode, refresh=refresh, live=live)
 
+async def _timed_fetch(endpoint: str, decode=None, refresh: bool = False, live: bool = False):
+    """Fetches an endpoint and returns (result_or_error, elapsed_seconds)."""
+    start = time.perf_counter()
     try:
-        setlist_data = await fetch_api_data(f"setlists/showdate/{date}.json")
-        # Process and merge setlist data if available
-        return _process_setlist_data(final_show_data, setlist_data)
+        result = await fetch_api_data(endpoint, decode, refresh, live)
     except APIError as e:
-        print(f"[ShowDetails] Could not fetch setlist details: {e}. Returning base show info.")
+        result = e
+    return result, time.perf_counter() - start
+
+async def fetch_show_parts(show_id: str, date: str = None, refresh: bool = False, live: bool = False):
+    """
+    Fetches the pieces of a show: (base Show, list of SongPlay rows).
+
+    Returns None if there is no Goose show on that date. The setlist is None
+    when only the setlist request failed. refresh refetches past the cache
+    and live uses the live tracker's rate-limit budget (see APIClient.fetch).
+
+    Raises UpstreamUnavailableError if either request was turned away by the
+    rate limiter or circuit breaker with nothing cached to fall back on, and
+    the APIError if the show request failed, so callers can tell a failed
+    fetch from a date without a show.
+    """
+    # Finished shows are answered from the local mirror without touching the API.
+    with tracer.child_span("catalog.get_show") as span:
+        mirrored = catalog.get_show(date)
+        span.set(hit=mirrored is not None)
+    if mirrored:
+        return mirrored
+
+    # Both requests are independent, so issue them together and pay for one round trip.
+    start = time.perf_counter()
+    (base_show_data_list, show_time), (setlist_data, setlist_time) = await asyncio.gather(
+        _timed_fetch(f"shows/showdate/{date}.json", decode_shows, refresh, live),
+        _timed_fetch(f"setlists/showdate/{date}.json", decode_setlist_rows, refresh, live),
+    )
+    total_time = time.perf_counter() - start
+    logger.debug(
+        "Show details for %s: show=%.3fs setlist=%.3fs total=%.3fs (sequential would be %.3fs)",
+        date, show_time, setlist_time, total_time, show_time + setlist_time
+    )
+
+    for result in (base_show_data_list, setlist_data):
+        if isinstance(result, UpstreamUnavailableError):
+            raise result
+    if isinstance(base_show_data_list, APIError):
+        logger.warning("Could not fetch base show data for %s: %s", date, base_show_data_list)
+        raise base_show_data_list
+    # decode_shows keeps only Goose shows
+    if not base_show_data_list:
+        return None
+    final_show_data = base_show_data_list[0]
+
+    if isinstance(setlist_data, APIError):
+        logger.warning("Could not fetch setlist details for %s: %s. Returning base show info.", date, setlist_data)
+        return final_show_data, None
+
+    return final_show_data, setlist_data or []
+
+async def fetch_show_details(show_id: str, date: str = None, refresh: bool = False, live: bool = False) -> Optional[Show]:
+    """Helper function to fetch detailed show information including setlist"""
+    parts = await fetch_show_parts(show_id, date, refresh, live)
+    if not parts:
+        return None
+
+    final_show_data, setlist_data = parts
+    if setlist_data is None:
         return final_show_data  # Return base data if setlist fails
 
+    # Process and merge setlist data if available
+    with tracer.child_span("process", rows=len(setlist_data)):
+        return _process_setlist_data(final_show_data, setlist_data)
+
 @bot.tree.command(name="setlist", description="Get setlist for a specific date (YYYY-MM-DD or YYYY/MM/DD)")
+@timed_command
 async def setlist(interaction: discord.Interaction, date: str):
     """Get setlist for a specific date"""
     try:
         # Validate date format
         parsed_date = datetime.datetime.strptime(date, '%Y-%m-%d')
-        print(f"[Setlist] Validated date format: {date}")
         
         # First, defer the response since API calls might take time
-        await interaction.response.defer()
-        print(f"[Setlist] Response deferred")
+        with tracer.child_span("defer"):
+            await interaction.response.defer()
         
-        print(f"[Setlist] Fetching data for date: {date}")
+        logger.debug("Fetching setlist for date: %s", date)
         
         # Try to get show data first
-        show_data = await fetch_show_details(None, date)
+        with tracer.child_span("fetch", date=date):
+            show_data = await fetch_show_details(None, date)
         
         if not show_data:
-            print(f"[Setlist] No data returned from API")
+            logger.info("No setlist data for %s", date)
             await interaction.followup.send(
                 "Unable to fetch setlist data. This could be due to:\n"
                 "• API connection issues\n"
@@ -196,14 +286,23 @@ async def setlist(interaction: discord.Interaction, date: str):
             return
         
         # Create embed using the new centralized function
-        embed = create_setlist_embed(show_data)
+        with tracer.child_span("render"):
+            embed = create_setlist_embed(show_data)
         
         # Send response
-        await interaction.followup.send(embed=embed)
-        print(f"[Setlist] Response sent successfully")
+        with tracer.child_span("send"):
+            await interaction.followup.send(embed=embed)
 
+    except UpstreamUnavailableError as e:
+        logger.warning("elgoose.net unavailable for /setlist %s: %s", date, e)
+        await interaction.followup.send(UPSTREAM_BUSY_MESSAGE, ephemeral=True)
+    except APIError as e:
+        logger.warning("Could not fetch the show for /setlist %s: %s", date, e)
+        await interaction.followup.send(
+            "Could not connect to the elgoose.net API. Please try again later.", ephemeral=True
+        )
     except ValueError as e:
-        print(f"[Setlist Error] Date format validation failed: {str(e)}")
+        logger.debug("Date format validation failed: %s", e)
         if not interaction.response.is_done():
             await interaction.response.send_message(
                 "Invalid date format. Please use YYYY-MM-DD format.\n"
@@ -216,29 +315,102 @@ async def setlist(interaction: discord.Interaction, date: str):
                 "Example: 2024-03-15",
                 ephemeral=True
             )
-    except Exception as e:
+    except Exception:
         error_msg = (
             "An error occurred while fetching the setlist.\n"
             "The error has been logged for investigation.\n"
             "Please try again later or contact support if the issue persists."
         )
-        print(f"[Setlist Error] Unexpected error: {str(e)}")
-        print(f"[Setlist Error] Error type: {type(e).__name__}")
-        traceback.print_exc()  # This prints the stack trace
+        logger.exception("Unexpected error in /setlist for %s", date)
+        metrics.inc("command_errors_total", command="setlist")
         if not interaction.response.is_done():
             await interaction.response.send_message(error_msg, ephemeral=True)
         else:
             await interaction.followup.send(error_msg, ephemeral=True)
 
-@bot.tree.command(name="song", description="Get statistics for a specific Goose song.")
+@bot.tree.command(name="setlists", description="Browse setlists for a date range, a year or a tour.")
+@app_commands.describe(
+    start="First date (YYYY-MM-DD)",
+    end="Last date (YYYY-MM-DD, defaults to today)",
+    year="Every show in this year",
+    tour="Tour name, or part of it",
+)
+@timed_command
+async def setlists(interaction: discord.Interaction, start: Optional[str] = None, end: Optional[str] = None,
+                   year: Optional[int] = None, tour: Optional[str] = None):
+    """Pages through the setlists of several shows, loading them concurrently."""
+    if sum(bool(option) for option in (start or end, year, tour)) != 1:
+        await interaction.response.send_message(
+            "Please give either a date range (start/end), a year, or a tour.", ephemeral=True
+        )
+        return
+    if year:
+        start, end = f"{year}-01-01", f"{year}-12-31"
+    elif start or end:
+        start = start or end
+        end = end or datetime.date.today().isoformat()
+        try:
+            datetime.datetime.strptime(start, '%Y-%m-%d')
+            datetime.datetime.strptime(end, '%Y-%m-%d')
+        except ValueError:
+            await interaction.response.send_message(
+                "Invalid date format. Please use YYYY-MM-DD format.\nExample: 2024-03-15", ephemeral=True
+            )
+            return
+        if start > end:
+            start, end = end, start
+
+    await interaction.response.defer()
+    shows = await find_shows(start, end, tour)
+    if not shows:
+        await interaction.followup.send("No Goose shows found for that selection.", ephemeral=True)
+        return
+
+    description = f"{len(shows)} show(s) from {shows[0].showdate} to {shows[-1].showdate}"
+    if len(shows) > SETLISTS_MAX_SHOWS:
+        shows = shows[:SETLISTS_MAX_SHOWS]
+        description += f" (showing the first {SETLISTS_MAX_SHOWS})"
+
+    tasks = fetch_shows_bounded([show.showdate for show in shows], fetch_show_details)
+    pager = SetlistPager(shows, tasks)
+    # Send page 1 as soon as its show is in; the rest keep loading in the background.
+    await asyncio.wait([tasks[0]])
+    pager.message = await interaction.followup.send(description, embed=pager.current_embed(), view=pager, wait=True)
+
+@bot.tree.command(name="song", description="Get statistics for a Goose song, or compare several.")
+@app_commands.describe(song_name="A song name, or up to 10 comma-separated names to compare")
+@timed_command
 async def song(interaction: discord.Interaction, song_name: str):
     """
-    Slash command to fetch and display statistics for a given song.
+    Slash command to fetch and display statistics for a given song, or a
+    comparison of several comma-separated songs.
     """
     await interaction.response.defer()  # Acknowledge the command may take time
-    
-    formatted_song_name = format_song_name(song_name)
-    song_data = await get_song_info(formatted_song_name)
+
+    # Autocomplete choices are already canonical; otherwise fall back to title-casing.
+    requested = parse_song_list(song_name)
+    formatted_names = [song_names.canonical(name) or format_song_name(name) for name in requested]
+    if len(formatted_names) > 1:
+        try:
+            results = await get_songs_info(formatted_names)
+        except UpstreamUnavailableError as e:
+            logger.warning("elgoose.net unavailable for /song %s: %s", song_name, e)
+            await interaction.followup.send(UPSTREAM_BUSY_MESSAGE, ephemeral=True)
+            return
+        found = [song_data for song_data in results if song_data]
+        if not found:
+            await interaction.followup.send("Sorry, I couldn't find any data for those songs. Please check the spelling and try again.", ephemeral=True)
+            return
+        missing = [name for name, song_data in zip(requested, results) if not song_data]
+        await interaction.followup.send(embed=create_song_comparison_embed(found, missing))
+        return
+
+    try:
+        song_data = await get_song_info(formatted_names[0]) if formatted_names else None
+    except UpstreamUnavailableError as e:
+        logger.warning("elgoose.net unavailable for /song %s: %s", song_name, e)
+        await interaction.followup.send(UPSTREAM_BUSY_MESSAGE, ephemeral=True)
+        return
     
     if song_data:
         embed = create_song_embed(song_data)
@@ -246,7 +418,55 @@ async def song(interaction: discord.Interaction, song_name: str):
     else:
         await interaction.followup.send(f"Sorry, I couldn't find any data for the song '{song_name}'. Please check the spelling and try again.", ephemeral=True)
 
+@song.autocomplete('song_name')
+async def song_name_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    """Suggests known song names as the user types, completing the last name of a comma-separated list."""
+    earlier, _, last = current.rpartition(',')
+    earlier_names = parse_song_list(earlier)
+    if not earlier_names:
+        return [app_commands.Choice(name=name, value=name) for name in song_names.suggest(last)]
+    prefix = ", ".join(song_names.canonical(name) or name for name in earlier_names) + ", "
+    # Discord caps choice names and values at 100 characters
+    return [
+        app_commands.Choice(name=prefix + name, value=prefix + name)
+        for name in song_names.suggest(last) if len(prefix + name) <= 100
+    ]
+
+@bot.tree.command(name="onthisday", description="Every Goose show played on this day in past years.")
+@app_commands.describe(date="Month and day (MM-DD); defaults to today")
+@timed_command
+async def onthisday(interaction: discord.Interaction, date: Optional[str] = None):
+    try:
+        if date:
+            parsed = datetime.datetime.strptime(f"2000-{date}", '%Y-%m-%d')
+            month, day = parsed.month, parsed.day
+        else:
+            today = datetime.date.today()
+            month, day = today.month, today.day
+    except ValueError:
+        await interaction.response.send_message("Invalid date format. Please use MM-DD format.\nExample: 12-31", ephemeral=True)
+        return
+    if not play_history.total_shows:
+        await interaction.response.send_message("The show history isn't loaded yet. Please try again later.", ephemeral=True)
+        return
+    await interaction.response.send_message(embed=create_onthisday_embed(month, day, play_history.shows_on(month, day)))
+
+@bot.tree.command(name="gaps", description="Songs with the longest current gaps, and bustout candidates.")
+@app_commands.describe(count="How many songs to list in each section (1-20)")
+@timed_command
+async def gaps(interaction: discord.Interaction, count: app_commands.Range[int, 1, 20] = 10):
+    if not play_history.total_shows:
+        await interaction.response.send_message("The show history isn't loaded yet. Please try again later.", ephemeral=True)
+        return
+    embed = create_gaps_embed(
+        play_history.longest_gaps(count, GAPS_MIN_PLAYS),
+        play_history.bustout_candidates(count, BUSTOUT_MIN_PLAYS),
+        play_history.total_shows,
+    )
+    await interaction.response.send_message(embed=embed)
+
 @bot.tree.command(name="help", description="Display bot command usage")
+@timed_command
 async def help(interaction: discord.Interaction):
     embed = discord.Embed(
         title="ElGoose Bot Commands",
@@ -256,9 +476,12 @@ async def help(interaction: discord.Interaction):
 
     commands = {
         "/setlist <date>": "Get setlist for a specific date (format: YYYY-MM-DD)",
-        "/song <song_name>": "Get statistics for a specific Goose song.",
-        "/live": "Start live setlist tracking for the current day's show.",
-        "/stop": "Stop live setlist tracking.",
+        "/setlists [start] [end] [year] [tour]": "Page through the setlists of a date range, a year or a tour.",
+        "/song <song_name>": "Get statistics for a specific Goose song, or compare up to 10 comma-separated songs.",
+        "/onthisday [date]": "Every show played on this day (or MM-DD) across all years.",
+        "/gaps [count]": "Songs with the longest current gaps, and bustout candidates.",
+        "/live": "Follow the current day's show live in this channel.",
+        "/stop": "Stop live setlist tracking in this server.",
         "/help": "Display this help message"
     }
 
@@ -267,26 +490,91 @@ async def help(interaction: discord.Interaction):
 
     await interaction.response.send_message(embed=embed)
 
-@bot.tree.command(name="live", description="Start live setlist tracking.")
+@bot.tree.command(name="live", description="Follow today's show live in this channel.")
+@timed_command
 async def live(interaction: discord.Interaction):
     if not live_setlist_tracker:
         await interaction.response.send_message("Live setlist tracker is not initialized.", ephemeral=True)
         return
     
-    response = await live_setlist_tracker.start()
-    await interaction.response.send_message(response, ephemeral=True)
+    # Subscribing posts a message in the channel, so acknowledge first.
+    await interaction.response.defer(ephemeral=True)
+    # Tonight's show may still be "today" in its own timezone after midnight Eastern.
+    show_date = show_day_scheduler.current_show_date() if show_day_scheduler else None
+    response = await live_setlist_tracker.start(interaction.channel_id, interaction.guild_id, show_date)
+    await interaction.followup.send(response, ephemeral=True)
 
-@bot.tree.command(name="stop", description="Stop live setlist tracking.")
+@bot.tree.command(name="stop", description="Stop live setlist tracking in this server.")
+@timed_command
 async def stop(interaction: discord.Interaction):
-    print("[StopCommand] /stop command received.")
     if not live_setlist_tracker:
-        print("[StopCommand] Live setlist tracker is not initialized.")
         await interaction.response.send_message("Live setlist tracker is not initialized.", ephemeral=True)
         return
     
-    response = await live_setlist_tracker.stop()
+    response = await live_setlist_tracker.stop(interaction.guild_id, interaction.channel_id)
     await interaction.response.send_message(response, ephemeral=True)
-    print("[StopCommand] Sent confirmation message to user.")
+
+def _latency_lines(metric: str, error_metric: str, label: str) -> str:
+    """One line per label value: call count, mean and p95 latency, and error count."""
+    lines = []
+    for (name, labels), histogram in sorted(metrics.histograms.items(), key=lambda item: item[0]):
+        if name != metric or not histogram.count:
+            continue
+        value = dict(labels).get(label, "?")
+        errors = metrics.counters.get((error_metric, labels), 0)
+        lines.append(
+            f"`{value}`: {histogram.count} calls, avg {histogram.sum / histogram.count * 1000:.0f}ms, "
+            f"p95 ≤{histogram.quantile(0.95) * 1000:.0f}ms, {errors:.0f} errors"
+        )
+    return "\n".join(lines) or "No data yet."
+
+@bot.tree.command(name="stats", description="Show bot latency, cache and live tracker statistics (admins only).")
+@app_commands.default_permissions(administrator=True)
+@app_commands.checks.has_permissions(administrator=True)
+async def stats(interaction: discord.Interaction):
+    embed = discord.Embed(title="ElGoose Bot Stats", color=discord.Color.dark_grey())
+    embed.add_field(name="API latency", value=_latency_lines("api_request_seconds", "api_errors_total", "endpoint")[:1024], inline=False)
+    embed.add_field(name="Command latency", value=_latency_lines("command_latency_seconds", "command_errors_total", "command")[:1024], inline=False)
+    for prefix, values in metrics.collect().items():
+        formatted = ", ".join(
+            f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}" for key, value in values.items()
+        )
+        embed.add_field(name=prefix, value=formatted[:1024] or "-", inline=False)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@stats.error
+async def stats_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    if isinstance(error, app_commands.MissingPermissions):
+        await interaction.response.send_message("This command is limited to server administrators.", ephemeral=True)
+    else:
+        raise error
+
+trace_group = app_commands.Group(
+    name="trace", description="Inspect interaction latency traces (admins only).",
+    default_permissions=discord.Permissions(administrator=True),
+)
+
+@trace_group.command(name="last", description="Show the step-by-step breakdown of recent slow interactions.")
+@app_commands.describe(count="How many slow interactions to show (1-5)")
+@app_commands.checks.has_permissions(administrator=True)
+async def trace_last(interaction: discord.Interaction, count: app_commands.Range[int, 1, 5] = 3):
+    traces = tracer.slowest_recent(count)
+    if not traces and tracer.recent:
+        # Nothing crossed the threshold; the latest trace still shows where time goes.
+        traces = [tracer.recent[-1]]
+    embed = create_trace_embed(traces, tracer.slow_seconds)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@trace_last.error
+async def trace_last_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    if isinstance(error, app_commands.MissingPermissions):
+        await interaction.response.send_message("This command is limited to server administrators.", ephemeral=True)
+    else:
+        raise error
+
+bot.tree.add_command(trace_group)
 
 if __name__ == "__main__":
-    bot.run(TOKEN)
\ No newline at end of file
+    configure_logging()
+    # discord.py would otherwise install its own handler on top of ours
+    bot.run(TOKEN, log_handler=None)
\ No newline at end of file
@@ -1,127 +1,407 @@
 import discord
 import asyncio
-from datetime import datetime, timedelta
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from datetime import datetime
 import html
 import pytz
+from config import LIVE_DEFAULT_TIMEZONE, LIVE_MAX_HOURS, LIVE_FANOUT_CONCURRENCY, LIVE_POST_SONG_UPDATES
 from exceptions import APIError
 from embeds import create_setlist_embed
+from models import Show
+from poll_scheduler import AdaptivePollScheduler
+from setlist_state import IncrementalSetlist
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+class LiveSubscription:
+    """A channel following the live setlist, and the message we keep editing there."""
+    __slots__ = ('key', 'channel', 'message', 'last_fingerprint')
+
+    def __init__(self, key, channel, message):
+        self.key = key
+        self.channel = channel
+        self.message = message
+        self.last_fingerprint = None
 
 class LiveSetlist:
-    def __init__(self, bot, channel_id, api_fetcher):
+    """
+    Live setlist engine shared by every subscribed channel.
+
+    Upstream is polled once per interval no matter how many channels are
+    subscribed; each result is rendered once and fanned out to every
+    subscriber's message with a bounded number of concurrent edits.
+    Subscriptions are keyed by guild, so each server follows the show in
+    one channel at a time.
+
+    api_fetcher(show_id, date, live=True) returns the (Show, [SongPlay]) pair
+    from fetch_show_parts, None if there is no show, and raises APIError for a
+    failed poll; the setlist is processed incrementally between polls and every
+    newly added song is reported to the delta listeners.
+
+    With a checkpoint_store, the tracker's state is saved after every change
+    so resume() can pick up the same messages after a restart.
+    """
+
+    def __init__(self, bot, api_fetcher, default_channel_id=None, checkpoint_store=None):
         self.bot = bot
-        self.channel_id = channel_id
+        self.checkpoint_store = checkpoint_store
+        self.end_time = None
         self.api_fetcher = api_fetcher
+        self.setlist_state = IncrementalSetlist()
+        self.delta_listeners = []
+        self.default_channel_id = default_channel_id
+        self.subscriptions = {}
         self.is_running = False
         self.task = None
+        self.show_date = None
+        self.last_show_data = None
+        self._last_fingerprint = None
+        self._last_payload = None
+        self._edit_semaphore = asyncio.Semaphore(LIVE_FANOUT_CONCURRENCY)
+        self.polls = 0
+        self.poll_errors = 0
+        self.changes_detected = 0
+        self.edits_sent = 0
+        self.edits_skipped = 0
+
+    @staticmethod
+    def fingerprint(show: Show) -> str:
+        """Content hash of a processed show, used to skip no-op message edits."""
+        encoded = json.dumps(show.to_dict(), sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscriptions),
+            "polls": self.polls,
+            "poll_errors": self.poll_errors,
+            "changes_detected": self.changes_detected,
+            "edits_sent": self.edits_sent,
+            "edits_skipped": self.edits_skipped,
+        }
+
+    async def start(self, channel_id=None, guild_id=None, show_date=None):
+        """
+        Subscribes a channel to live updates, starting the poll loop if needed.
+        show_date defaults to today in LIVE_DEFAULT_TIMEZONE; it is ignored
+        when tracking is already running.
+        """
+        channel_id = channel_id or self.default_channel_id
+        if channel_id is None:
+            return "No channel is available for live setlist updates."
+        key = guild_id or channel_id
+
+        existing = self.subscriptions.get(key)
+        if existing and existing.channel.id == channel_id:
+            return "Live setlist tracking is already in progress in this channel."
+        if existing:
+            # One channel per server; replacing it would leave the old message looking live forever
+            return (
+                f"Live setlist tracking is already following the show in <#{existing.channel.id}>. "
+                "Use /stop first to follow it here instead."
+            )
+
+        try:
+            channel = await self.bot.fetch_channel(channel_id)
+        except discord.NotFound:
+            logger.error("Channel %s not found. Make sure the ID is correct and the bot is in the server.", channel_id)
+            return "Could not find this channel."
+        except discord.Forbidden:
+            logger.error("No permissions to fetch channel %s. Check the bot's role permissions.", channel_id)
+            return "I don't have permission to view this channel."
+        except Exception:
+            logger.exception("Unexpected error fetching channel %s", channel_id)
+            return "An unexpected error occurred. See logs for details."
+
+        if not self.is_running:
+            self.show_date = show_date or datetime.now(pytz.timezone(LIVE_DEFAULT_TIMEZONE)).strftime('%Y-%m-%d')
+            # Hard upper bound; the scheduler normally finishes once the encore is stable.
+            self.end_time = time.time() + LIVE_MAX_HOURS * 3600
+            self.last_show_data = None
+            self.setlist_state.reset()
+            self._last_fingerprint = None
+            self._last_payload = None
+
+        try:
+            message = await channel.send(f"Starting live setlist tracking for {self.show_date}... Waiting for show data.")
+            logger.info("Started live tracking in channel %s", channel_id)
+        except discord.Forbidden:
+            logger.error("No permissions to send messages in channel %s. Check channel-specific permissions.", channel_id)
+            return "I don't have permission to send messages in this channel."
+        except Exception:
+            logger.exception("Unexpected error sending the initial message to %s", channel_id)
+            return "An unexpected error occurred. See logs for details."
+
+        subscription = LiveSubscription(key, channel, message)
+        self.subscriptions[key] = subscription
 
-    async def start(self):
         if self.is_running:
-            return "Live setlist tracking is already in progress."
+            # Late subscribers get the current state right away instead of waiting for the next poll.
+            if self._last_payload is not None:
+                await self._deliver(subscription, self._last_fingerprint, self._last_payload)
+            self._save_checkpoint()
+            return "This channel is now following the live setlist."
 
         self.is_running = True
+        self._save_checkpoint()
         self.task = asyncio.create_task(self._run_tracker())
         return "Live setlist tracking has started."
 
-    async def stop(self):
-        print(f"[LiveTracker] Stop method called. Current state: is_running={self.is_running}")
-        if not self.is_running:
-            print("[LiveTracker] Tracker is not active. Nothing to stop.")
+    async def resume(self) -> int:
+        """
+        Resumes from the saved checkpoint after a restart, re-attaching to the
+        existing messages instead of posting new ones. Returns the number of
+        subscribers restored.
+        """
+        if self.checkpoint_store is None or self.is_running:
+            return 0
+        checkpoint = self.checkpoint_store.load()
+        if not checkpoint:
+            return 0
+
+        restored = await asyncio.gather(*(
+            self._restore_subscription(entry) for entry in checkpoint["subscriptions"]
+        ))
+        self.subscriptions = {subscription.key: subscription for subscription in restored if subscription}
+        if not self.subscriptions:
+            self.checkpoint_store.clear()
+            return 0
+
+        self.show_date = checkpoint["show_date"]
+        self.end_time = checkpoint["end_time"]
+        self.setlist_state.resume(checkpoint["row_keys"])
+        self.last_show_data = None
+        self._last_fingerprint = checkpoint["fingerprint"]
+        self._last_payload = None
+        self.is_running = True
+        self._save_checkpoint()
+        self.task = asyncio.create_task(self._run_tracker())
+        logger.info(
+            "Resumed live tracking for %s in %d channel(s) after %d processed row(s)",
+            self.show_date, len(self.subscriptions), len(checkpoint["row_keys"])
+        )
+        return len(self.subscriptions)
+
+    async def _restore_subscription(self, entry: dict):
+        try:
+            channel = await self.bot.fetch_channel(entry["channel_id"])
+            message = await channel.fetch_message(entry["message_id"])
+        except (discord.NotFound, discord.Forbidden) as e:
+            logger.info("Not resuming %s; channel or message is gone: %s", entry["key"], e)
+            return None
+        except discord.HTTPException as e:
+            logger.warning("Could not resume %s: %s", entry["key"], e)
+            return None
+        subscription = LiveSubscription(entry["key"], channel, message)
+        subscription.last_fingerprint = entry["fingerprint"]
+        return subscription
+
+    def _save_checkpoint(self):
+        """Writes the current state to the checkpoint store, or clears it once tracking is over."""
+        if self.checkpoint_store is None:
+            return
+        try:
+            if not self.is_running or not self.subscriptions:
+                self.checkpoint_store.clear()
+                return
+            self.checkpoint_store.save(
+                self.show_date, self.end_time, self._last_fingerprint, self.setlist_state.processed_keys(),
+                [
+                    (subscription.key, subscription.channel.id, subscription.message.id, subscription.last_fingerprint)
+                    for subscription in self.subscriptions.values()
+                ],
+            )
+        except sqlite3.Error as e:
+            logger.warning("Could not save live checkpoint: %s", e)
+
+    async def stop(self, guild_id=None, channel_id=None):
+        """Unsubscribes a guild (or channel); stops polling once nobody is subscribed."""
+        key = guild_id or channel_id or self.default_channel_id
+        logger.info("Stop requested for %s (is_running=%s)", key, self.is_running)
+        if not self.is_running or key not in self.subscriptions:
+            logger.info("Tracker is not active for %s; nothing to stop", key)
             return "Live setlist tracking is not active."
 
+        del self.subscriptions[key]
+        self._save_checkpoint()
+        if self.subscriptions:
+            logger.info("Unsubscribed %s; %d subscriber(s) remain", key, len(self.subscriptions))
+            return "Live setlist tracking has been stopped."
+
         self.is_running = False
-        print("[LiveTracker] Set is_running to False.")
         if self.task:
-            print("[LiveTracker] Cancelling tracker task.")
+            logger.info("Cancelling tracker task")
             self.task.cancel()
             try:
                 await self.task
             except asyncio.CancelledError:
-                print("[LiveTracker] Task successfully cancelled.")
-        else:
-            print("[LiveTracker] No task found to cancel.")
-            
+                logger.info("Tracker task cancelled")
+
         return "Live setlist tracking has been stopped."
 
     async def _run_tracker(self):
-        try:
-            channel = await self.bot.fetch_channel(self.channel_id)
-        except discord.NotFound:
-            print(f"Error: Channel {self.channel_id} not found. Make sure the ID is correct and the bot is in the server.")
-            self.is_running = False
-            return
-        except discord.Forbidden:
-            print(f"Error: No permissions to fetch channel {self.channel_id}. Check the bot's role permissions.")
-            self.is_running = False
-            return
-        except Exception as e:
-            print(f"An unexpected error occurred when fetching channel: {e}")
-            self.is_running = False
-            return
-
-        eastern_tz = pytz.timezone('America/New_York')
-        show_date = datetime.now(eastern_tz).strftime('%Y-%m-%d')
-        end_time = datetime.now(eastern_tz) + timedelta(hours=3.5)
-        message = None
-        last_show_data = None
-
-        try:
-            message = await channel.send(f"Starting live setlist tracking for {show_date}... Waiting for show data.")
-            print(f"Successfully started live tracking in channel {self.channel_id}.")
-        except discord.Forbidden:
-            print(f"Error: No permissions to send messages in channel {self.channel_id}. Check channel-specific permissions.")
-            self.is_running = False
-            return
-        except Exception as e:
-            print(f"An unexpected error occurred when sending the initial message: {e}")
-            self.is_running = False
-            return
+        scheduler = AdaptivePollScheduler()
 
-        while self.is_running and datetime.now(eastern_tz) < end_time:
+        while self.is_running and self.subscriptions and time.time() < self.end_time:
             try:
-                show_data_result = await self._update_setlist(message, show_date)
+                changes_before = self.changes_detected
+                errors_before = self.poll_errors
+                # Each poll is its own trace, not part of the /live interaction that started the loop
+                with tracer.span("live.poll", new_trace=True, show_date=self.show_date,
+                                 subscribers=len(self.subscriptions)):
+                    show_data_result = await self._update_setlist(self.show_date)
                 if show_data_result:
-                    last_show_data = show_data_result
-                await asyncio.sleep(300)  # 5 minutes
-            except Exception as e:
-                print(f"Error in live setlist update loop: {e}")
+                    self.last_show_data = show_data_result
+                self._save_checkpoint()
+                scheduler.observe(
+                    show_data_result, self.changes_detected > changes_before, failed=self.poll_errors > errors_before
+                )
+                if scheduler.is_finished:
+                    logger.info("Encore detected and stable; finishing tracking")
+                    break
+                logger.debug("Next poll: %s %s", scheduler.describe(), self.stats())
+                await asyncio.sleep(scheduler.next_delay())
+            except Exception:
+                logger.exception("Error in live setlist update loop")
                 await asyncio.sleep(60) # Wait a minute before retrying
 
         self.is_running = False
-        if message:
-            try:
-                # If we have show data, edit the embed to remove the 'live' footer.
-                if last_show_data:
-                    final_embed = create_setlist_embed(last_show_data, is_live=False)
-                    await message.edit(embed=final_embed)
-                
-                # Send a new, separate message to announce the end of tracking.
-                await message.channel.send("Live setlist tracking has ended.")
-            except Exception as e:
-                print(f"Error finalizing live tracking messages: {e}")
+        subscriptions = list(self.subscriptions.values())
+        self.subscriptions = {}
+        self._save_checkpoint()
+        await asyncio.gather(*(self._finalize(subscription) for subscription in subscriptions))
 
-    async def _update_setlist(self, message, show_date):
+    async def _finalize(self, subscription):
         try:
-            show_data = await self.api_fetcher(None, show_date)
-            print(f"[LiveTracker] Fetched show_data: {show_data}")
+            # If we have show data, edit the embed to remove the 'live' footer.
+            if self.last_show_data:
+                final_embed = create_setlist_embed(self.last_show_data, is_live=False)
+                await subscription.message.edit(embed=final_embed)
 
-            if not show_data:
-                print("[LiveTracker] No show data found. Posting 'No show scheduled' message.")
-                await message.edit(content=f"No show scheduled for today ({show_date}). Waiting for data...", embed=None)
+            # Send a new, separate message to announce the end of tracking.
+            await subscription.channel.send("Live setlist tracking has ended.")
+        except Exception as e:
+            logger.warning("Error finalizing live tracking messages in %s: %s", subscription.channel.id, e)
+
+    async def _update_setlist(self, show_date):
+        """Polls upstream once and fans the result out to every subscriber."""
+        self.polls += 1
+        try:
+            with tracer.child_span("fetch"):
+                show_parts = await self.api_fetcher(None, show_date, live=True)
+
+            if not show_parts:
+                logger.info("No show data found for %s", show_date)
+                await self._broadcast(
+                    "no-show",
+                    {"content": f"No show scheduled for today ({show_date}). Waiting for data...", "embed": None},
+                    is_status=True,
+                )
                 return None
 
-            embed = create_setlist_embed(show_data, is_live=True)
-            
-            print("[LiveTracker] Embed created. Attempting to edit message.")
-            await message.edit(content=None, embed=embed)
-            print("[LiveTracker] Message successfully edited.")
+            base_show, setlist = show_parts
+            # A failed setlist fetch keeps the previous state rather than blanking the sets.
+            with tracer.child_span("process", rows=len(setlist) if setlist is not None else 0):
+                deltas = self.setlist_state.update(setlist) if setlist is not None else None
+                show_data = self.setlist_state.to_show(base_show)
+            if deltas:
+                await self._announce(deltas)
+
+            fingerprint = self.fingerprint(show_data)
+            if fingerprint == self._last_fingerprint and self._last_payload is not None:
+                # Unchanged: skip rendering, but still catch up subscribers whose last edit failed.
+                await self._broadcast(fingerprint, self._last_payload)
+            else:
+                with tracer.child_span("render"):
+                    embed = create_setlist_embed(show_data, is_live=True)
+                await self._broadcast(fingerprint, {"content": None, "embed": embed})
             return show_data
-            
+
         except APIError as e:
-            print(f"[LiveTracker] An API error occurred: {e}")
-            await message.edit(content=f"Could not connect to the elgoose.net API. Retrying in 5 minutes...", embed=None)
+            self.poll_errors += 1
+            logger.warning("API error while polling: %s", e)
+            await self._broadcast(
+                "api-error",
+                {"content": "Could not connect to the elgoose.net API. Retrying shortly...", "embed": None},
+                is_status=True,
+            )
             return None
-        except Exception as e:
-            print(f"[LiveTracker] An unexpected error occurred in _update_setlist: {e}")
+        except Exception:
+            self.poll_errors += 1
+            logger.exception("Unexpected error while polling")
             # Optional: Send a more generic error message to Discord
-            await message.edit(content="An unexpected error occurred. See logs for details.", embed=None)
-            return None 
\ No newline at end of file
+            await self._broadcast(
+                "unexpected-error",
+                {"content": "An unexpected error occurred. See logs for details.", "embed": None},
+                is_status=True,
+            )
+            return None
+
+    def add_delta_listener(self, callback):
+        """Registers an async callback(deltas) called with the songs added by each poll."""
+        self.delta_listeners.append(callback)
+
+    async def _announce(self, deltas):
+        for delta in deltas:
+            logger.info("%s", delta.describe())
+        for callback in self.delta_listeners:
+            try:
+                await callback(deltas)
+            except Exception as e:
+                logger.warning("Delta listener failed: %s", e)
+        if LIVE_POST_SONG_UPDATES:
+            text = "\n".join(delta.describe() for delta in deltas)
+            await asyncio.gather(*(
+                self._post(subscription, text) for subscription in list(self.subscriptions.values())
+            ))
+
+    async def _post(self, subscription, text: str):
+        async with self._edit_semaphore:
+            try:
+                await subscription.channel.send(text)
+            except discord.HTTPException as e:
+                logger.warning("Failed to post song update to %s: %s", subscription.key, e)
+
+    async def _broadcast(self, fingerprint: str, payload: dict, is_status: bool = False):
+        """
+        Sends payload to every subscriber not already showing it. Status
+        notices (no show yet, API errors) are not setlist changes: they leave
+        the last setlist fingerprint and payload alone, so the next good poll
+        is compared against the setlist and restores it on every message.
+        """
+        if not is_status:
+            if fingerprint != self._last_fingerprint:
+                self.changes_detected += 1
+                self._last_fingerprint = fingerprint
+            self._last_payload = payload
+        with tracer.child_span("broadcast", subscribers=len(self.subscriptions)):
+            await asyncio.gather(*(
+                self._deliver(subscription, fingerprint, payload)
+                for subscription in list(self.subscriptions.values())
+            ))
+
+    async def _deliver(self, subscription, fingerprint: str, payload: dict):
+        """Edits one subscriber's message unless it already shows this content."""
+        if subscription.last_fingerprint == fingerprint:
+            self.edits_skipped += 1
+            return
+        # Bounded concurrency keeps bursts under Discord's global rate limit;
+        # discord.py waits out any per-route 429s itself.
+        async with self._edit_semaphore:
+            try:
+                with tracer.child_span("edit"):
+                    await subscription.message.edit(**payload)
+                subscription.last_fingerprint = fingerprint
+                self.edits_sent += 1
+            except (discord.NotFound, discord.Forbidden) as e:
+                logger.info("Dropping subscriber %s; message is gone or not editable: %s", subscription.key, e)
+                if self.subscriptions.get(subscription.key) is subscription:
+                    del self.subscriptions[subscription.key]
+            except discord.HTTPException as e:
+                # Leave the fingerprint stale so the next poll retries this subscriber.
+                logger.warning("Failed to edit message for %s: %s", subscription.key, e)
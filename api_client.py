@@ -0,0 +1,413 @@
+import aiohttp
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+from config import (
+    API_BASE_URL,
+    API_POOL_LIMIT,
+    API_POOL_LIMIT_PER_HOST,
+    API_DNS_CACHE_TTL,
+    API_KEEPALIVE_TIMEOUT,
+    API_REQUEST_TIMEOUT,
+    API_MAX_RETRIES,
+    API_RETRY_BASE_DELAY,
+    API_RETRY_MAX_DELAY,
+    API_RATE_LIMIT_PER_SECOND,
+    API_RATE_LIMIT_BURST,
+    API_RATE_LIMIT_MAX_WAIT,
+    API_LIVE_RATE_LIMIT_PER_SECOND,
+    API_LIVE_RATE_LIMIT_BURST,
+    API_BREAKER_FAILURE_THRESHOLD,
+    API_BREAKER_RESET_SECONDS,
+    API_CACHE_MAX_ENTRIES,
+    API_CACHE_SHORT_TTL,
+    API_CACHE_MEDIUM_TTL,
+    API_CACHE_PATH,
+    API_CACHE_MAX_STALE,
+    API_COMPRESSION,
+    API_DECODE_THREAD_BYTES,
+)
+import json_codec
+from cache import MISS, ResponseCache, ttl_for_endpoint
+from exceptions import APIError, CircuitOpenError, RateLimitedError, UpstreamUnavailableError
+from models import payload_fields, project_rows
+from resilience import CircuitBreaker, TokenBucket, backoff_delay
+from singleflight import SingleFlight
+from metrics import endpoint_label, metrics
+from tracing import current_span, tracer
+
+logger = logging.getLogger(__name__)
+
+# aiohttp decodes brotli responses only when a brotli package is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "br, gzip, deflate"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "br, gzip, deflate"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+def _decode_response(body: bytes, fields, decode, loads):
+    """
+    Parses a response body, unwraps the API envelope, keeps only `fields` of
+    each row and applies decode. Returns (payload, decoded), decoded being
+    MISS without a decode. Runs in a worker thread for large bodies.
+    """
+    json_data = loads(body)
+    data = json_data
+    if isinstance(json_data, dict) and 'error' in json_data:
+        if json_data['error']:
+            raise APIError(f"API returned error: {json_data.get('error_message')}")
+        data = json_data.get('data')
+    if fields is not None:
+        data = project_rows(data, fields)
+    return data, (decode(data) if decode is not None else MISS)
+
+class APIClient:
+    """
+    Long-lived client for the elgoose.net API.
+
+    Owns a single aiohttp session backed by a keep-alive connection pool so
+    repeated requests reuse TCP/TLS connections instead of re-handshaking.
+    Call start() once during bot setup and close() on shutdown.
+
+    Successful payloads are kept in a ResponseCache; see cache.ttl_for_endpoint
+    for how long each kind of endpoint is kept. Concurrent cache misses for the
+    same endpoint share a single upstream request. When upstream sends ETag or
+    Last-Modified headers, repeat requests are made conditional and a 304
+    reuses the previous payload.
+
+    Upstream requests share a token-bucket rate limit and a per-request
+    timeout. Transient failures (timeouts, network errors, 5xx, 429) are
+    retried with jittered exponential backoff; repeated failures open a
+    circuit breaker so callers fail fast, and cached callers get the last
+    known (stale) payload instead of an error while upstream is down.
+
+    Responses are requested compressed (gzip, or brotli when available) and
+    parsed with json_codec. Only the row fields listed in models.payload_fields
+    are kept, and bodies of at least decode_thread_bytes are parsed and
+    decoded in a worker thread so large song histories don't stall the
+    event loop.
+    """
+
+    def __init__(
+        self,
+        base_url: str = API_BASE_URL,
+        limit: int = API_POOL_LIMIT,
+        limit_per_host: int = API_POOL_LIMIT_PER_HOST,
+        dns_cache_ttl: int = API_DNS_CACHE_TTL,
+        keepalive_timeout: float = API_KEEPALIVE_TIMEOUT,
+        cache: Optional[ResponseCache] = None,
+        short_ttl: float = API_CACHE_SHORT_TTL,
+        medium_ttl: float = API_CACHE_MEDIUM_TTL,
+        request_timeout: float = API_REQUEST_TIMEOUT,
+        max_retries: int = API_MAX_RETRIES,
+        retry_base_delay: float = API_RETRY_BASE_DELAY,
+        retry_max_delay: float = API_RETRY_MAX_DELAY,
+        limiter: Optional[TokenBucket] = None,
+        live_limiter: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        compress: bool = API_COMPRESSION,
+        decode_thread_bytes: int = API_DECODE_THREAD_BYTES,
+        project_fields: bool = True,
+        loads=json_codec.loads,
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.cache = cache if cache is not None else ResponseCache(
+            API_CACHE_MAX_ENTRIES, API_CACHE_PATH, API_CACHE_MAX_STALE
+        )
+        self.short_ttl = short_ttl
+        self.medium_ttl = medium_ttl
+        self.flights = SingleFlight()
+        self.request_timeout = aiohttp.ClientTimeout(total=request_timeout)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.limiter = limiter or TokenBucket(
+            API_RATE_LIMIT_PER_SECOND, API_RATE_LIMIT_BURST, API_RATE_LIMIT_MAX_WAIT or None
+        )
+        # Separate budget for live tracker polls; falls back to the shared limiter when a custom one is given
+        self.live_limiter = live_limiter or (
+            TokenBucket(API_LIVE_RATE_LIMIT_PER_SECOND, API_LIVE_RATE_LIMIT_BURST, API_RATE_LIMIT_MAX_WAIT or None)
+            if limiter is None else self.limiter
+        )
+        self.breaker = breaker or CircuitBreaker(API_BREAKER_FAILURE_THRESHOLD, API_BREAKER_RESET_SECONDS)
+        self.accept_encoding = ACCEPT_ENCODING if compress else "identity"
+        self.decode_thread_bytes = decode_thread_bytes
+        self.project_fields = project_fields
+        self.loads = loads
+        # endpoint -> [etag, last_modified, payload, decoded payload, decode] for conditional revalidation
+        self._validators: "OrderedDict[str, tuple]" = OrderedDict()
+        self.max_validators = 256
+        self.not_modified = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None and not self._session.closed
+
+    async def start(self):
+        """Opens the pooled session. Safe to call more than once."""
+        if self.is_open:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        self._session = aiohttp.ClientSession(connector=connector)
+        logger.info(
+            "Session opened (limit=%d, per_host=%d, dns_ttl=%ds)",
+            self.limit, self.limit_per_host, self.dns_cache_ttl
+        )
+
+    async def close(self):
+        """Closes the session and releases all pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("Session closed")
+        self._session = None
+        logger.info("Cache stats at shutdown: %s", self.cache.stats())
+        logger.info("Coalescing stats at shutdown: %s", self.flights.stats())
+        self.cache.close()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # Lazily open the session so callers outside the bot lifecycle still work.
+        if not self.is_open:
+            await self.start()
+        return self._session
+
+    async def fetch(self, endpoint: str, use_cache: bool = True, decode=None, refresh: bool = False,
+                    live: bool = False):
+        """
+        Fetches an API endpoint relative to the base URL.
+
+        Returns the unwrapped 'data' payload for API envelopes, or the raw JSON
+        otherwise. If decode is given, the payload is passed through it once
+        and the decoded result is what gets returned and kept in memory; an
+        endpoint should always be fetched through the cache with the same
+        decode. Concurrent fetches of an endpoint are only coalesced when
+        they use the same decode, so uncached callers that want the raw
+        payload never receive another caller's decoded objects. With
+        refresh, the cached copy is skipped but the fresh payload still
+        replaces it, which keeps an entry warm ahead of its readers. live
+        requests draw from the live tracker's own rate-limit budget. Raises
+        APIError on network, status or API-reported errors. Errors are never
+        cached; while upstream is unavailable a cached call returns the last
+        known payload if there is one.
+        """
+        with tracer.child_span("api.fetch", endpoint=endpoint_label(endpoint)) as span:
+            if use_cache and not refresh:
+                cached = self.cache.get(endpoint, decode)
+                if cached is not MISS:
+                    logger.debug("Cache hit: %s", endpoint)
+                    metrics.inc("api_cache_hits_total", endpoint=endpoint_label(endpoint))
+                    span.set(cache="hit")
+                    return cached
+
+            span.set(cache="miss")
+            return await self.flights.do(
+                (endpoint, decode), lambda: self._fetch_and_store(endpoint, use_cache, decode, live)
+            )
+
+    async def _fetch_and_store(self, endpoint: str, use_cache: bool, decode, live: bool = False):
+        try:
+            data, decoded = await self._fetch_with_retries(endpoint, decode, live)
+        except UpstreamUnavailableError as e:
+            if use_cache:
+                stale = self.cache.get_stale(endpoint, decode)
+                if stale is not MISS:
+                    logger.warning("Serving stale data for %s: %s", endpoint, e)
+                    metrics.inc("api_stale_served_total", endpoint=endpoint_label(endpoint))
+                    return stale
+            raise
+        if decoded is MISS:
+            decoded = decode(data) if decode is not None else data
+            if endpoint in self._validators:
+                self._validators[endpoint][3:] = [decoded, decode]
+        if use_cache:
+            self.cache.set(
+                endpoint, data, ttl_for_endpoint(endpoint, self.short_ttl, self.medium_ttl),
+                decoded if decode is not None else MISS
+            )
+        return decoded
+
+    async def _fetch_with_retries(self, endpoint: str, decode=None, live: bool = False):
+        """
+        Rate-limited _fetch_uncached with retries for transient errors, guarded
+        by the circuit breaker. A full rate-limit queue raises RateLimitedError
+        straight away; it says nothing about upstream, so it isn't retried.
+        """
+        limiter = self.live_limiter if live else self.limiter
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                metrics.inc("api_circuit_rejected_total", endpoint=endpoint_label(endpoint))
+                raise CircuitOpenError(
+                    f"elgoose.net is unavailable; retrying in {self.breaker.retry_after():.0f}s",
+                    self.breaker.retry_after(),
+                )
+            try:
+                with tracer.child_span("api.rate_limit"):
+                    await limiter.acquire()
+            except RateLimitedError:
+                # Nothing was sent, so hand back a half-open trial slot rather than holding it forever
+                self.breaker.release_trial()
+                metrics.inc("api_rate_limited_total", endpoint=endpoint_label(endpoint))
+                raise
+            except asyncio.CancelledError:
+                self.breaker.release_trial()
+                raise
+            try:
+                with tracer.child_span("api.request", endpoint=endpoint_label(endpoint), attempt=attempt):
+                    result = await self._fetch_uncached(endpoint, decode)
+            except asyncio.CancelledError:
+                self.breaker.release_trial()
+                raise
+            except UpstreamUnavailableError as e:
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay)
+                if e.retry_after is not None:
+                    delay = min(max(delay, e.retry_after), self.retry_max_delay)
+                logger.info("Retrying %s in %.2fs (attempt %d/%d): %s", endpoint, delay, attempt + 1, self.max_retries, e)
+                metrics.inc("api_retries_total", endpoint=endpoint_label(endpoint))
+                await asyncio.sleep(delay)
+            except APIError:
+                # Upstream answered; the request itself was bad, so this says nothing about availability.
+                self.breaker.record_success()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+
+    def _remember_validators(self, endpoint: str, response: aiohttp.ClientResponse, data, decoded, decode):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            self._validators.pop(endpoint, None)
+            return
+        self._validators[endpoint] = [etag, last_modified, data, decoded, decode]
+        self._validators.move_to_end(endpoint)
+        while len(self._validators) > self.max_validators:
+            self._validators.popitem(last=False)
+
+    async def _fetch_uncached(self, endpoint: str, decode=None):
+        """
+        Performs the HTTP request. Returns (payload, decoded), where decoded is
+        the payload passed through decode (the previously decoded payload on a
+        304 if it was made by the same decode), or MISS if there is none.
+        """
+        session = await self._get_session()
+        route = endpoint_label(endpoint)
+        status = "error"
+        start_time = time.perf_counter()
+        try:
+            full_url = f"{self.base_url}/{endpoint}"
+            logger.debug("Request: %s", full_url)
+
+            # Revalidate previously seen payloads so unchanged responses cost a 304
+            validator = self._validators.get(endpoint)
+            headers = {'Accept-Encoding': self.accept_encoding}
+            if validator is not None:
+                etag, last_modified = validator[0], validator[1]
+                if etag:
+                    headers['If-None-Match'] = etag
+                if last_modified:
+                    headers['If-Modified-Since'] = last_modified
+
+            async with session.get(full_url, headers=headers, timeout=self.request_timeout) as response:
+                status = str(response.status)
+                logger.debug(
+                    "Response %s for %s in %.3fs", response.status, endpoint, time.perf_counter() - start_time
+                )
+
+                if response.status == 304 and validator is not None:
+                    self.not_modified += 1
+                    self._validators.move_to_end(endpoint)
+                    # The stored decoded payload may come from a caller with a different decode
+                    return validator[2], (validator[3] if validator[4] is decode else MISS)
+
+                if response.status == 200:
+                    body = await response.read()
+                    # Content-Length is the size on the wire (compressed, if it was); chunked responses
+                    # don't carry one, and len(body) is the decompressed size, so they aren't counted.
+                    if response.content_length is not None:
+                        metrics.inc("api_response_bytes_total", response.content_length, endpoint=route)
+                    metrics.inc("api_decoded_bytes_total", len(body), endpoint=route)
+                    fields = payload_fields(endpoint) if self.project_fields else None
+                    in_thread = bool(self.decode_thread_bytes and len(body) >= self.decode_thread_bytes)
+                    try:
+                        with tracer.child_span("api.decode", bytes=len(body), thread=in_thread):
+                            if in_thread:
+                                metrics.inc("api_thread_decodes_total", endpoint=route)
+                                data, decoded = await asyncio.to_thread(_decode_response, body, fields, decode, self.loads)
+                            else:
+                                data, decoded = _decode_response(body, fields, decode, self.loads)
+                    except APIError as e:
+                        # Treat API-reported error as a failure
+                        logger.error("API returned error message for %s: %s", endpoint, e)
+                        raise
+                    except ValueError as e:
+                        logger.error("JSON parsing failed for %s: %s", endpoint, e)
+                        raise APIError("Failed to parse API response.") from e
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Parsed JSON: %.500s...", data)
+
+                    self._remember_validators(endpoint, response, data, decoded, decode)
+                    return data, decoded
+                elif response.status == 429 or response.status >= 500:
+                    logger.warning("Transient status code for %s: %s", endpoint, response.status)
+                    raise UpstreamUnavailableError(
+                        f"API returned status code {response.status}",
+                        _parse_retry_after(response.headers.get('Retry-After')),
+                    )
+                else:
+                    logger.error("Non-200 status code for %s: %s", endpoint, response.status)
+                    raise APIError(f"API returned status code {response.status}")
+        except APIError:
+            metrics.inc("api_errors_total", endpoint=route)
+            raise
+        except asyncio.TimeoutError as e:
+            logger.warning("Request for %s timed out after %.1fs", endpoint, self.request_timeout.total)
+            metrics.inc("api_errors_total", endpoint=route)
+            raise UpstreamUnavailableError("The request to the elgoose.net API timed out.") from e
+        except aiohttp.ClientError as e:
+            logger.warning("Network error for %s: %s", endpoint, e)
+            metrics.inc("api_errors_total", endpoint=route)
+            raise UpstreamUnavailableError(f"A network error occurred: {e}") from e
+        except Exception as e:
+            logger.exception("Unexpected error fetching %s", endpoint)
+            metrics.inc("api_errors_total", endpoint=route)
+            raise APIError(f"An unexpected error occurred: {e}") from e
+        finally:
+            elapsed = time.perf_counter() - start_time
+            current_span().set(status=status)
+            metrics.observe("api_request_seconds", elapsed, endpoint=route)
+            metrics.inc("api_requests_total", endpoint=route, status=status)
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After in delta-seconds form; HTTP-date values are ignored."""
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+# Shared client used by every module that talks to elgoose.net
+api_client = APIClient()
+metrics.register_collector("api_cache", api_client.cache.stats)
+metrics.register_collector("api_coalescing", api_client.flights.stats)
+metrics.register_collector("api_conditional", lambda: {"not_modified": api_client.not_modified})
+metrics.register_collector("api_circuit", api_client.breaker.stats)
+metrics.register_collector("api_rate_limiter", api_client.limiter.stats)
+metrics.register_collector("api_live_rate_limiter", api_client.live_limiter.stats)
@@ -0,0 +1,197 @@
+"""
+Local stand-in for the elgoose.net API, serving recorded fixtures.
+
+Point the bot (or the load test) at it with API_BASE_URL. Serves
+shows/showdate, setlists/showdate and setlists/songname from a fixture file
+keyed by endpoint path; songname and showyear lookups that weren't recorded
+are answered from the recorded per-date payloads. Latency and error
+injection are configurable, and one date can be served as a "live" show
+whose setlist grows as it is polled. With compression on, bodies are sent
+brotli- or gzip-encoded according to the request's Accept-Encoding.
+
+Usage:
+    python benchmarks/api_stub.py [--port 8765] [--latency-ms 80] [--jitter-ms 20] [--error-rate 0.02]
+    python benchmarks/api_stub.py --record 2023-12-31 2023-12-30 ...   # refresh fixtures from the real API
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import random
+import sys
+import urllib.parse
+from collections import Counter
+from aiohttp import web
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'elgoose_api.json')
+
+def _envelope(data) -> dict:
+    return {"error": False, "error_message": "", "data": data}
+
+def load_fixtures(path: str = DEFAULT_FIXTURES) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+class StubAPI:
+    """
+    aiohttp application answering elgoose.net-style endpoint paths.
+
+    request_counts tracks upstream requests per route (e.g. 'setlists/showdate')
+    so a benchmark can report how many requests actually reached "upstream";
+    bytes_sent counts response body bytes as sent (after compression).
+    """
+
+    def __init__(self, fixtures: dict, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 live_date: str = None, live_source: str = None, live_step: int = 1, seed: int = 0,
+                 compress: bool = False):
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.live_date = live_date
+        self.live_source = live_source
+        self.live_step = max(1, live_step)
+        self.compress = compress
+        self.bytes_sent = 0
+        self.request_counts = Counter()
+        self.errors_injected = 0
+        self._live_polls = 0
+        self._random = random.Random(seed)
+        self._song_rows = self._index_song_rows()
+
+    def _index_song_rows(self) -> dict:
+        by_song = {}
+        for path, payload in self.fixtures.items():
+            if path.startswith('setlists/showdate/'):
+                for row in payload.get('data') or []:
+                    by_song.setdefault(row['songname'].casefold(), []).append(row)
+        for rows in by_song.values():
+            rows.sort(key=lambda row: row['showdate'])
+        return by_song
+
+    def reset_counts(self):
+        self.request_counts.clear()
+        self.errors_injected = 0
+        self.bytes_sent = 0
+
+    def _live_payload(self, kind: str):
+        """The live show: the source show's data, with one more setlist row every live_step polls."""
+        source = self.fixtures.get(f"{kind}/showdate/{self.live_source}.json", _envelope([]))
+        rows = [dict(row, showdate=self.live_date) for row in source.get('data') or []]
+        if kind == 'shows':
+            return _envelope(rows)
+        self._live_polls += 1
+        return _envelope(rows[:self._live_polls // self.live_step])
+
+    def lookup(self, path: str) -> dict:
+        if path in self.fixtures:
+            return self.fixtures[path]
+        parts = path.removesuffix('.json').split('/')
+        if len(parts) == 3 and parts[1] == 'showdate' and parts[2] == self.live_date and self.live_source:
+            return self._live_payload(parts[0])
+        if len(parts) == 3 and parts[:2] == ['setlists', 'songname']:
+            return _envelope(self._song_rows.get(parts[2].casefold(), []))
+        if len(parts) == 3 and parts[1] == 'showyear':
+            # Per-year lists are the concatenation of that year's recorded per-date payloads
+            prefix = f"{parts[0]}/showdate/{parts[2]}-"
+            return _envelope([
+                item for path, payload in sorted(self.fixtures.items()) if path.startswith(prefix)
+                for item in payload.get('data') or []
+            ])
+        # Unknown dates behave like the real API: an empty result, not an error
+        return _envelope([])
+
+    async def handle(self, request: web.Request) -> web.Response:
+        path = urllib.parse.unquote_plus(request.match_info['path'])
+        self.request_counts["/".join(path.split('/')[:2])] += 1
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors_injected += 1
+            return web.Response(status=500, text="Injected error")
+        body = json.dumps(self.lookup(path)).encode()
+        headers = {}
+        accept_encoding = request.headers.get('Accept-Encoding', '') if self.compress else ''
+        if brotli is not None and 'br' in accept_encoding:
+            body = brotli.compress(body, quality=5)
+            headers['Content-Encoding'] = 'br'
+        elif 'gzip' in accept_encoding:
+            body = gzip.compress(body, compresslevel=6)
+            headers['Content-Encoding'] = 'gzip'
+        self.bytes_sent += len(body)
+        return web.Response(body=body, content_type='application/json', headers=headers)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/{path:.*}', self.handle)
+        return app
+
+async def start_stub(stub: StubAPI, host: str = '127.0.0.1', port: int = 0):
+    """Starts the stub; returns (runner, base_url). port=0 picks a free port."""
+    runner = web.AppRunner(stub.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}"
+
+async def record(dates: list, path: str):
+    """Fetches the given dates from the real API and merges them into the fixture file."""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('DISCORD_TOKEN', 'benchmark')
+    from api_client import api_client
+
+    fixtures = load_fixtures(path) if os.path.exists(path) else {}
+    await api_client.start()
+    try:
+        for date in dates:
+            for kind in ('shows', 'setlists'):
+                endpoint = f"{kind}/showdate/{date}.json"
+                fixtures[endpoint] = _envelope(await api_client.fetch(endpoint, use_cache=False))
+                print(f"recorded {endpoint}")
+    finally:
+        await api_client.close()
+    with open(path, 'w') as f:
+        json.dump(fixtures, f, indent=1)
+
+async def _serve(args):
+    stub = StubAPI(
+        load_fixtures(args.fixtures), args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate,
+        args.live_date, args.live_source, args.live_step, compress=args.compress,
+    )
+    runner, base_url = await start_stub(stub, args.host, args.port)
+    print(f"Stub API serving {len(stub.fixtures)} fixtures at {base_url} (set API_BASE_URL={base_url})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        print(f"Requests served: {dict(stub.request_counts)}, errors injected: {stub.errors_injected}, bytes sent: {stub.bytes_sent}")
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local elgoose.net API stub for benchmarks.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--compress', action='store_true', help="Send gzip/brotli-encoded bodies when the client accepts them")
+    parser.add_argument('--live-date', help="Serve this date as a live show built from --live-source")
+    parser.add_argument('--live-source', default='2023-12-31', help="Recorded date whose setlist the live show replays")
+    parser.add_argument('--live-step', type=int, default=1, help="Setlist polls per newly revealed song")
+    parser.add_argument('--record', nargs='+', metavar='DATE', help="Record these dates from the real API instead of serving")
+    args = parser.parse_args()
+    try:
+        if args.record:
+            asyncio.run(record(args.record, args.fixtures))
+        else:
+            asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,163 @@
+"""
+Event-loop stall and transfer size for large song-history responses, before
+and after compressed transfers, orjson, field projection and worker-thread
+decoding.
+
+Serves synthetic song histories (rows carrying the full set of fields the
+real API returns) from the local stub, run as a separate process so its
+encoding work doesn't land on the measured loop. Fetches them uncached
+through APIClient configured the old way and the new way, and meanwhile
+measures how late a 1ms heartbeat task wakes up on the event loop.
+
+Usage:
+    python benchmarks/bench_decode.py [--rows 3000] [--songs 8] [--rounds 3]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DISCORD_TOKEN', 'benchmark')  # config.py refuses to import without one
+
+from api_client import APIClient
+from cache import ResponseCache
+from load_test import percentile
+from metrics import metrics
+from models import decode_setlist_rows
+from resilience import TokenBucket
+import json_codec
+
+STUB_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api_stub.py')
+
+def _history_row(song: str, index: int) -> dict:
+    """A setlist row shaped like the real API's, most of whose fields the bot never reads."""
+    year = 2014 + index % 11
+    date = f"{year}-{1 + index % 12:02d}-{1 + index % 28:02d}"
+    return {
+        "uniqueid": 100000 + index, "show_id": 1600000000 + index, "showdate": date,
+        "showtitle": "", "permalink": f"goose-{date}-venue-{index}.html", "showyear": str(year),
+        "showorder": 1, "venuename": f"Venue {index % 300}", "city": "Somewhere", "state": "NY",
+        "country": "USA", "location": "Somewhere, NY", "venue_id": index % 300, "artist": "Goose",
+        "artist_id": 1, "songname": song, "slug": song.lower().replace(' ', '-'), "song_id": 42,
+        "isoriginal": 1, "original_artist": "Goose", "tourname": "Fall Tour", "tour_id": 90,
+        "position": index % 20 + 1, "setnumber": str(index % 2 + 1), "settype": "Set",
+        "transition": ", ", "transition_id": 1, "footnote": "", "isjam": 0, "isreprise": 0,
+        "isjamchart": index % 7 == 0, "jamchart_description": "Type II jam into an extended peak." * (index % 7 == 0),
+        "tracktime": "12:34", "gap": index % 17, "shownotes": "Soundcheck: Arcadia, Hungersite.",
+        "soundcheck": "", "opener": "", "isverified": 1, "timezone": "America/New_York",
+    }
+
+def build_fixtures(songs: int, rows: int) -> dict:
+    return {
+        f"setlists/songname/Song {n}.json": {
+            "error": False, "error_message": "",
+            "data": [_history_row(f"Song {n}", index) for index in range(rows)],
+        }
+        for n in range(songs)
+    }
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+async def start_stub_process(fixtures_path: str):
+    """Runs api_stub.py with compression in a child process; returns (process, base_url) once it answers."""
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, STUB_SCRIPT, '--port', str(port), '--fixtures', fixtures_path, '--compress'],
+        stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    async with aiohttp.ClientSession() as session:
+        for _ in range(100):
+            try:
+                async with session.get(f"{base_url}/songs.json"):
+                    return process, base_url
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.1)
+    process.kill()
+    raise RuntimeError("API stub did not start")
+
+def _bytes_received() -> float:
+    return sum(value for (name, _), value in metrics.counters.items() if name == "api_response_bytes_total")
+
+async def _heartbeat(lags: list, stop: asyncio.Event, interval: float = 0.001):
+    """Records how much later than requested each 1ms sleep returns."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+async def run_case(name: str, base_url: str, songs: int, rounds: int, **client_options) -> dict:
+    client = APIClient(
+        base_url=base_url, cache=ResponseCache(16), limiter=TokenBucket(0, 0), **client_options
+    )
+    await client.start()
+    bytes_before = _bytes_received()
+    lags = []
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(lags, stop))
+    start = time.perf_counter()
+    try:
+        for _ in range(rounds):
+            await asyncio.gather(*(
+                client.fetch(f"setlists/songname/Song%20{n}.json?order_by=showdate&direction=asc",
+                             use_cache=False, decode=decode_setlist_rows)
+                for n in range(songs)
+            ))
+    finally:
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await heartbeat
+        await client.close()
+    lags.sort()
+    requests = songs * rounds
+    return {
+        "case": name,
+        "requests": requests,
+        "bytes_per_response": (_bytes_received() - bytes_before) / requests,
+        "max_stall_ms": lags[-1] * 1000 if lags else 0.0,
+        "p99_stall_ms": percentile(lags, 0.99) * 1000,
+        "total_s": elapsed,
+    }
+
+async def main(args):
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+        json.dump(build_fixtures(args.songs, args.rows), f)
+    process, base_url = await start_stub_process(f.name)
+    try:
+        results = [
+            await run_case(
+                "before", base_url, args.songs, args.rounds,
+                compress=False, decode_thread_bytes=0, project_fields=False, loads=json.loads,
+            ),
+            await run_case("after", base_url, args.songs, args.rounds),
+        ]
+    finally:
+        process.terminate()
+        process.wait()
+        os.unlink(f.name)
+
+    print(f"{args.songs} song histories x {args.rows} rows, {args.rounds} rounds; JSON backend: {json_codec.BACKEND}")
+    print(f"{'case':<8}{'bytes/resp':>12}{'max stall ms':>14}{'p99 stall ms':>14}{'total s':>10}")
+    for result in results:
+        print(
+            f"{result['case']:<8}{result['bytes_per_response']:>12.0f}{result['max_stall_ms']:>14.1f}"
+            f"{result['p99_stall_ms']:>14.1f}{result['total_s']:>10.2f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark API response transfer size and event-loop stalls.")
+    parser.add_argument('--rows', type=int, default=3000, help="Plays per song history")
+    parser.add_argument('--songs', type=int, default=8, help="Song histories fetched concurrently per round")
+    parser.add_argument('--rounds', type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,59 @@
+"""
+Micro-benchmark for setlist/song embed rendering, with and without the render cache.
+
+Usage:
+    python benchmarks/bench_embeds.py [iterations]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DISCORD_TOKEN', 'benchmark')  # config.py refuses to import without one
+
+from embeds import (
+    create_setlist_embed, create_song_embed, _render_setlist_embed, _render_song_embed, render_cache
+)
+from models import Footnote, SetBlock, Show
+
+def _sample_show() -> Show:
+    base = Show(1, '2023-12-31', 'Madison Square Garden', 'New York, NY', '2023-12-31-msg')
+    sets = [
+        SetBlock('Set 1', "Arcadia> Hungersite, Madhuvan> Tumble, Hot Tea[1] > Arrow"),
+        SetBlock('Set 2', "Flodown> Seekers on the Ridge> Factory Fiction, Rockdale> Echo of a Rose[2]"),
+        SetBlock('Encore', "Time to Flee> Dripfield"),
+    ]
+    notes = [Footnote('1', 'With horns.'), Footnote('2', 'Unfinished.')]
+    return base.with_setlist(sets, "New Year's Eve.", notes)
+
+def _sample_song() -> dict:
+    play = {"date": "2023-12-31", "venue": "Madison Square Garden", "url": "https://elgoose.net/setlists/x"}
+    return {
+        "song_name": "Arcadia", "song_url": "https://elgoose.net/song/arcadia", "times_played": 212,
+        "gap": 3, "first_play": play, "last_play": play, "second_last_play": play,
+    }
+
+def _time_per_call(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main(iterations: int):
+    show = _sample_show()
+    song = _sample_song()
+    cases = [
+        ("setlist", lambda: _render_setlist_embed(show, False), lambda: create_setlist_embed(show, False)),
+        ("setlist (live)", lambda: _render_setlist_embed(show, True), lambda: create_setlist_embed(show, True)),
+        ("song", lambda: _render_song_embed(song), lambda: create_song_embed(song)),
+    ]
+    print(f"{'embed':<16}{'uncached (us/call)':>20}{'cached (us/call)':>20}{'speedup':>10}")
+    for name, uncached, cached in cases:
+        before = _time_per_call(uncached, iterations)
+        cached()  # warm the cache
+        after = _time_per_call(cached, iterations)
+        print(f"{name:<16}{before:>20.2f}{after:>20.2f}{before / after:>9.1f}x")
+    print(f"render cache: {render_cache.stats()}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
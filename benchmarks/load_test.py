@@ -0,0 +1,256 @@
+"""
+Offline load test: drives the /setlist and /song handlers and the live tracker
+against the local API stub, with fake Discord interactions and channels.
+
+Reports p50/p95/p99 latency, throughput and how many requests reached the
+stub ("upstream") for each scenario, so regressions show up as numbers.
+
+Usage:
+    python benchmarks/load_test.py [--requests 500] [--concurrency 25] [--latency-ms 80] [--cold] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DISCORD_TOKEN', 'benchmark')  # config.py refuses to import without one
+
+from api_stub import StubAPI, load_fixtures, start_stub
+
+class _FakeResponse:
+    def __init__(self, latency: float):
+        self._latency = latency
+        self._done = False
+
+    async def defer(self, **kwargs):
+        await asyncio.sleep(self._latency)
+        self._done = True
+
+    async def send_message(self, *args, **kwargs):
+        await asyncio.sleep(self._latency)
+        self._done = True
+
+    def is_done(self) -> bool:
+        return self._done
+
+class _FakeFollowup:
+    def __init__(self, latency: float):
+        self._latency = latency
+        self.sent = []
+
+    async def send(self, *args, **kwargs):
+        await asyncio.sleep(self._latency)
+        self.sent.append((args, kwargs))
+
+class FakeInteraction:
+    """Just enough of discord.Interaction for the command handlers."""
+
+    def __init__(self, discord_latency: float = 0.0, channel_id: int = 1, guild_id: int = 1):
+        self.response = _FakeResponse(discord_latency)
+        self.followup = _FakeFollowup(discord_latency)
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+
+    def was_sent(self, content: str) -> bool:
+        return any(args[:1] == (content,) or kwargs.get('content') == content for args, kwargs in self.followup.sent)
+
+class UpstreamBusy(Exception):
+    """A command answered with the busy reply instead of a result; counted as a failure."""
+
+class FakeMessage:
+    def __init__(self, latency: float):
+        self._latency = latency
+        self.edits = 0
+
+    async def edit(self, **kwargs):
+        await asyncio.sleep(self._latency)
+        self.edits += 1
+
+class FakeChannel:
+    def __init__(self, channel_id: int, latency: float):
+        self.id = channel_id
+        self._latency = latency
+
+    async def send(self, *args, **kwargs):
+        await asyncio.sleep(self._latency)
+        return FakeMessage(self._latency)
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+def summarize(name: str, latencies: list, wall: float, failures: int, stub: StubAPI) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "scenario": name,
+        "calls": len(latencies),
+        "failures": failures,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "throughput_per_s": len(latencies) / wall if wall else 0.0,
+        "upstream_requests": sum(stub.request_counts.values()),
+        "upstream_by_route": dict(stub.request_counts),
+        "errors_injected": stub.errors_injected,
+    }
+
+async def run_load(call, inputs: list, concurrency: int):
+    """
+    Runs call(item) for every input with at most `concurrency` in flight.
+    A call fails if it raises, including UpstreamBusy for a busy reply.
+    """
+    latencies = []
+    failures = 0
+    pending = iter(inputs)
+
+    async def worker():
+        nonlocal failures
+        for item in pending:
+            start = time.perf_counter()
+            try:
+                await call(item)
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start, failures
+
+async def run_live(bot_module, stub: StubAPI, live_date: str, subscribers: int, polls: int, discord_latency: float):
+    """Polls the live show `polls` times with `subscribers` channels attached, timing each poll."""
+    from LiveSetlist import LiveSetlist, LiveSubscription
+    from api_client import api_client
+    from resilience import TokenBucket
+
+    tracker = LiveSetlist(None, bot_module.fetch_show_parts)
+    tracker.show_date = live_date
+    tracker.is_running = True
+    for channel_id in range(subscribers):
+        channel = FakeChannel(channel_id, discord_latency)
+        tracker.subscriptions[channel_id] = LiveSubscription(channel_id, channel, FakeMessage(discord_latency))
+
+    # Real polls are at least LIVE_POLL_FAST_SECONDS apart, well inside the live rate-limit budget
+    api_client.live_limiter = TokenBucket(0, 0)
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(polls):
+        # Each real poll is far enough apart that the short-TTL entries have expired
+        for kind in ('shows', 'setlists'):
+            api_client.cache.invalidate(f"{kind}/showdate/{live_date}.json")
+        poll_start = time.perf_counter()
+        await tracker._update_setlist(live_date)
+        latencies.append(time.perf_counter() - poll_start)
+    tracker.is_running = False
+    result = summarize(f"live ({subscribers} channels)", latencies, time.perf_counter() - start, 0, stub)
+    result.update(tracker.stats())
+    return result
+
+async def main(args):
+    fixtures = load_fixtures(args.fixtures)
+    live_date = time.strftime('%Y-%m-%d')
+    stub = StubAPI(
+        fixtures, args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate,
+        live_date=live_date, live_source=args.live_source, live_step=1, seed=args.seed,
+    )
+    runner, base_url = await start_stub(stub)
+
+    # Route the bot at the stub and keep the local mirror and disk cache out of the measurement.
+    os.environ['API_BASE_URL'] = base_url
+    os.environ['CATALOG_PATH'] = ':memory:'
+    os.environ['API_CACHE_PATH'] = ''
+    if args.cold:
+        os.environ['API_CACHE_MAX_ENTRIES'] = '0'
+        os.environ['EMBED_CACHE_SIZE'] = '0'
+    if args.rate_limit is not None:
+        os.environ['API_RATE_LIMIT_PER_SECOND'] = str(args.rate_limit)
+    if args.rate_limit_max_wait is not None:
+        os.environ['API_RATE_LIMIT_MAX_WAIT'] = str(args.rate_limit_max_wait)
+    import ElGooseDiscord as bot_module
+    from api_client import api_client
+    from log_config import configure_logging
+    from metrics import metrics
+    configure_logging(args.log_level)
+
+    discord_latency = args.discord_latency_ms / 1000
+    dates = sorted(path.split('/')[-1].removesuffix('.json') for path in fixtures if path.startswith('shows/showdate/'))
+    songs = sorted({row['songname'] for path, payload in fixtures.items()
+                    if path.startswith('setlists/showdate/') for row in payload['data']})
+
+    async def setlist_call(date):
+        interaction = FakeInteraction(discord_latency)
+        await bot_module.setlist.callback(interaction, date)
+        if interaction.was_sent(bot_module.UPSTREAM_BUSY_MESSAGE):
+            raise UpstreamBusy(date)
+
+    async def song_call(name):
+        interaction = FakeInteraction(discord_latency)
+        await bot_module.song.callback(interaction, name.lower())
+        if interaction.was_sent(bot_module.UPSTREAM_BUSY_MESSAGE):
+            raise UpstreamBusy(name)
+
+    results = []
+    await api_client.start()
+    try:
+        for name, call, pool in (("setlist", setlist_call, dates + ['1999-01-01']), ("song", song_call, songs)):
+            stub.reset_counts()
+            rejected_before = api_client.limiter.rejected
+            inputs = [pool[i % len(pool)] for i in range(args.requests)]
+            latencies, wall, failures = await run_load(call, inputs, args.concurrency)
+            results.append(summarize(name, latencies, wall, failures, stub))
+            # Requests turned away by API_RATE_LIMIT_MAX_WAIT; those commands answered busy (a failure) or with stale data
+            results[-1]["rate_limited"] = api_client.limiter.rejected - rejected_before
+
+        stub.reset_counts()
+        results.append(await run_live(bot_module, stub, live_date, args.subscribers, args.live_polls, discord_latency))
+    finally:
+        await api_client.close()
+        await runner.cleanup()
+
+    print(
+        f"{'scenario':<22}{'calls':>7}{'fail':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'calls/s':>10}"
+        f"{'upstream':>10}{'limited':>9}"
+    )
+    for result in results:
+        print(
+            f"{result['scenario']:<22}{result['calls']:>7}{result['failures']:>6}{result['p50_ms']:>9.1f}"
+            f"{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}{result['throughput_per_s']:>10.1f}"
+            f"{result['upstream_requests']:>10}{result.get('rate_limited', 0):>9}"
+        )
+    print(f"api cache: {api_client.cache.stats()}")
+    print(f"coalescing: {api_client.flights.stats()}")
+    print(f"rate limiter: {api_client.limiter.stats()}")
+    command_errors = {dict(labels).get('command'): count for (name, labels), count in metrics.counters.items()
+                      if name == 'command_errors_total'}
+    if command_errors:
+        print(f"command errors: {command_errors}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline load test against the local API stub.")
+    parser.add_argument('--requests', type=int, default=500, help="Calls per command scenario")
+    parser.add_argument('--concurrency', type=int, default=25)
+    parser.add_argument('--latency-ms', type=float, default=80, help="Simulated upstream latency")
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--discord-latency-ms', type=float, default=0, help="Simulated Discord API latency")
+    parser.add_argument('--subscribers', type=int, default=50, help="Channels following the live show")
+    parser.add_argument('--live-polls', type=int, default=30)
+    parser.add_argument('--live-source', default='2023-12-31', help="Recorded show the live scenario replays")
+    parser.add_argument('--cold', action='store_true', help="Disable the API and embed caches")
+    parser.add_argument('--rate-limit', type=float, help="Override API_RATE_LIMIT_PER_SECOND (0 disables the limiter)")
+    parser.add_argument('--rate-limit-max-wait', type=float, help="Override API_RATE_LIMIT_MAX_WAIT (0 lets requests queue without a bound)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fixtures', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'elgoose_api.json'))
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    parser.add_argument('--log-level', default='WARNING')
+    asyncio.run(main(parser.parse_args()))
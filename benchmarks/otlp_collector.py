@@ -0,0 +1,96 @@
+"""
+Local stand-in for an OpenTelemetry collector's OTLP/HTTP JSON receiver.
+
+Accepts POST /v1/traces, appends each received span to a JSONL file as a
+flat record, and prints a one-line summary per root span. Run the bot with
+TRACE_EXPORTER=otlp and TRACE_OTLP_ENDPOINT=http://127.0.0.1:4318/v1/traces.
+
+Usage:
+    python benchmarks/otlp_collector.py [--port 4318] [--output otlp_spans.jsonl]
+"""
+import argparse
+import asyncio
+import json
+from aiohttp import web
+
+def _attribute_value(value: dict):
+    for kind in ('stringValue', 'boolValue', 'doubleValue'):
+        if kind in value:
+            return value[kind]
+    if 'intValue' in value:
+        return int(value['intValue'])
+    return None
+
+def flatten_spans(payload: dict) -> list:
+    """Flattens an ExportTraceServiceRequest into one dict per span."""
+    spans = []
+    for resource_spans in payload.get('resourceSpans', []):
+        resource = {
+            attribute['key']: _attribute_value(attribute['value'])
+            for attribute in resource_spans.get('resource', {}).get('attributes', [])
+        }
+        for scope_spans in resource_spans.get('scopeSpans', []):
+            for span in scope_spans.get('spans', []):
+                start, end = int(span['startTimeUnixNano']), int(span['endTimeUnixNano'])
+                spans.append({
+                    "service": resource.get('service.name'),
+                    "trace_id": span['traceId'],
+                    "span_id": span['spanId'],
+                    "parent_id": span.get('parentSpanId'),
+                    "name": span['name'],
+                    "duration_ms": (end - start) / 1e6,
+                    "attributes": {
+                        attribute['key']: _attribute_value(attribute['value']) for attribute in span.get('attributes', [])
+                    },
+                    "status": span.get('status', {}).get('code'),
+                })
+    return spans
+
+class Collector:
+    def __init__(self, output: str):
+        self.output = output
+        self.spans_received = 0
+
+    async def handle_traces(self, request: web.Request) -> web.Response:
+        try:
+            payload = await request.json()
+        except ValueError:
+            return web.json_response({"error": "invalid JSON"}, status=400)
+        spans = flatten_spans(payload)
+        self.spans_received += len(spans)
+        with open(self.output, 'a') as f:
+            for span in spans:
+                f.write(json.dumps(span) + "\n")
+        for span in spans:
+            if not span['parent_id']:
+                print(f"{span['trace_id'][:12]} {span['name']:<16} {span['duration_ms']:8.1f}ms")
+        # An empty ExportTraceServiceResponse means everything was accepted
+        return web.json_response({})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/v1/traces', self.handle_traces)
+        return app
+
+async def _serve(args):
+    collector = Collector(args.output)
+    runner = web.AppRunner(collector.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    print(f"OTLP collector stand-in listening on http://{args.host}:{args.port}/v1/traces, writing {args.output}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        print(f"Spans received: {collector.spans_received}")
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OTLP/HTTP JSON trace receiver.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4318)
+    parser.add_argument('--output', default='otlp_spans.jsonl')
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,207 @@
+import re
+import sqlite3
+import time
+import datetime
+from collections import OrderedDict
+from typing import Any, Optional
+import json_codec
+
+# Sentinel returned on a cache miss, since None/[] are valid cached payloads
+MISS = object()
+
+# Payloads are cached forever once their show date is in the past. A one-day
+# grace period covers late-night shows in timezones behind ours and
+# post-show setlist corrections.
+IMMUTABLE_GRACE_DAYS = 1
+
+_SHOWDATE_RE = re.compile(r'(?:shows|setlists)/showdate/(\d{4}-\d{2}-\d{2})\.json')
+
+class _Entry:
+    __slots__ = ('value', 'expires_at')
+
+    def __init__(self, value, expires_at: Optional[float]):
+        self.value = value
+        self.expires_at = expires_at
+
+    def is_expired(self, now: float) -> bool:
+        return self.expires_at is not None and now >= self.expires_at
+
+class DiskStore:
+    """Small SQLite-backed key/value store used as the cache's second tier."""
+
+    def __init__(self, path: str, max_stale: float = 0.0):
+        self.path = path
+        self.max_stale = max_stale
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS api_cache ("
+            " key TEXT PRIMARY KEY,"
+            " expires_at REAL,"
+            " payload TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, allow_stale: bool = False):
+        row = self._conn.execute(
+            "SELECT expires_at, payload FROM api_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return MISS, None
+        expires_at, payload = row
+        now = time.time()
+        if expires_at is not None and now >= expires_at:
+            # Expired rows stay around for max_stale so they can be served during an outage
+            if now >= expires_at + self.max_stale:
+                self.delete(key)
+                return MISS, None
+            if not allow_stale:
+                return MISS, None
+        return json_codec.loads(payload), expires_at
+
+    def set(self, key: str, value, expires_at: Optional[float]):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO api_cache (key, expires_at, payload) VALUES (?, ?, ?)",
+            (key, expires_at, json_codec.dumps(value)),
+        )
+        self._conn.commit()
+
+    def delete(self, key: str):
+        self._conn.execute("DELETE FROM api_cache WHERE key = ?", (key,))
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+class ResponseCache:
+    """
+    Two-tier cache for API payloads: an in-memory LRU in front of an optional
+    on-disk store. Entries carry their own expiry; None means never expire.
+    """
+
+    def __init__(self, max_entries: int = 512, disk_path: Optional[str] = None, max_stale: float = 0.0):
+        self.max_entries = max_entries
+        # Seconds past expiry that an entry may still be returned by get_stale()
+        self.max_stale = max_stale
+        self._memory: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._disk = DiskStore(disk_path, max_stale) if disk_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _too_stale(self, entry: _Entry, now: float) -> bool:
+        return entry.expires_at is not None and now >= entry.expires_at + self.max_stale
+
+    def get(self, key: str, decode=None) -> Any:
+        """
+        Returns the cached value for key, or MISS.
+
+        The disk tier holds raw JSON payloads; decode is applied to them when
+        they are promoted back into memory.
+        """
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            if not entry.is_expired(now):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            if self._too_stale(entry, now):
+                del self._memory[key]
+
+        if self._disk is not None:
+            value, expires_at = self._disk.get(key)
+            if value is not MISS:
+                if decode is not None:
+                    value = decode(value)
+                # Promote to memory so the next lookup skips the disk
+                self._store_memory(key, value, expires_at)
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return MISS
+
+    def get_stale(self, key: str, decode=None) -> Any:
+        """
+        Returns the value for key even if it has expired (up to max_stale
+        seconds ago), or MISS. Used to keep answering while upstream is down.
+        """
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None and not self._too_stale(entry, now):
+            self.stale_hits += 1
+            return entry.value
+
+        if self._disk is not None:
+            value, _ = self._disk.get(key, allow_stale=True)
+            if value is not MISS:
+                self.stale_hits += 1
+                return decode(value) if decode is not None else value
+        return MISS
+
+    def set(self, key: str, value, ttl: Optional[float], decoded=MISS):
+        """
+        Caches value under key. A ttl of None caches it without expiry.
+
+        When a decoded form is given, memory holds the decoded (compact)
+        object while the disk tier keeps the raw JSON value.
+        """
+        expires_at = None if ttl is None else time.time() + ttl
+        self._store_memory(key, value if decoded is MISS else decoded, expires_at)
+        if self._disk is not None:
+            self._disk.set(key, value, expires_at)
+
+    def _store_memory(self, key: str, value, expires_at: Optional[float]):
+        self._memory[key] = _Entry(value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: str):
+        self._memory.pop(key, None)
+        if self._disk is not None:
+            self._disk.delete(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+def is_past_date(date_str: str) -> bool:
+    """Whether a YYYY-MM-DD show date is far enough in the past to be final."""
+    try:
+        show_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return False
+    cutoff = datetime.date.today() - datetime.timedelta(days=IMMUTABLE_GRACE_DAYS)
+    return show_date < cutoff
+
+def ttl_for_endpoint(endpoint: str, short_ttl: float, medium_ttl: float) -> Optional[float]:
+    """
+    Picks a cache TTL for an API endpoint.
+
+    Show and setlist lookups for past dates never change, so they are cached
+    without expiry. Today's and future dates get the short TTL, song history
+    lookups the medium TTL, and anything else the short TTL.
+    """
+    if match := _SHOWDATE_RE.search(endpoint):
+        return None if is_past_date(match.group(1)) else short_ttl
+    if endpoint.startswith('setlists/songname/'):
+        return medium_ttl
+    return short_ttl
@@ -0,0 +1,233 @@
+import argparse
+import asyncio
+import datetime
+import logging
+import sqlite3
+from typing import Optional
+import json_codec
+from config import CATALOG_PATH, CATALOG_FIRST_YEAR
+from api_client import api_client
+from cache import is_past_date
+from exceptions import APIError
+from log_config import configure_logging
+from models import Show, SongPlay
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shows (
+    show_id INTEGER PRIMARY KEY,
+    showdate TEXT NOT NULL,
+    venuename TEXT,
+    permalink TEXT,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS setlist_rows (
+    row_key TEXT PRIMARY KEY,
+    show_id INTEGER,
+    showdate TEXT NOT NULL,
+    songname TEXT NOT NULL COLLATE NOCASE,
+    position INTEGER,
+    venuename TEXT,
+    permalink TEXT,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_shows_showdate ON shows (showdate);
+CREATE INDEX IF NOT EXISTS idx_shows_venuename ON shows (venuename);
+CREATE INDEX IF NOT EXISTS idx_shows_permalink ON shows (permalink);
+CREATE INDEX IF NOT EXISTS idx_setlist_rows_showdate ON setlist_rows (showdate, position);
+CREATE INDEX IF NOT EXISTS idx_setlist_rows_songname ON setlist_rows (songname, showdate);
+CREATE INDEX IF NOT EXISTS idx_setlist_rows_venuename ON setlist_rows (venuename);
+CREATE INDEX IF NOT EXISTS idx_setlist_rows_permalink ON setlist_rows (permalink);
+"""
+
+def _is_goose(item: dict) -> bool:
+    return item.get('artist', '').lower() == 'goose'
+
+def _row_key(row: dict) -> str:
+    if row.get('uniqueid') is not None:
+        return str(row['uniqueid'])
+    return f"{row.get('show_id')}-{row.get('position')}"
+
+class Catalog:
+    """
+    Local SQLite mirror of Goose's show and setlist history.
+
+    Rows are stored as the API client returns them, trimmed to the fields in
+    models.SHOW_FIELDS and models.SETLIST_ROW_FIELDS, and lookups decode
+    them into the same models as API responses. A field added to those sets
+    only reaches mirrored rows after a full resync. Only dates that are
+    final (see cache.is_past_date) are mirrored; anything newer is left to
+    the live API.
+    """
+
+    def __init__(self, path: str = CATALOG_PATH):
+        self.path = path
+        self._listeners = []
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    @property
+    def last_synced_date(self) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM sync_state WHERE key = 'last_synced_date'").fetchone()
+        return row[0] if row else None
+
+    def _set_last_synced_date(self, date: str):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('last_synced_date', ?)", (date,)
+        )
+
+    @property
+    def is_initialized(self) -> bool:
+        return self.last_synced_date is not None
+
+    def get_show(self, date: str):
+        """
+        Returns (Show, [SongPlay]) for a date, or None if the mirror doesn't
+        have that date.
+        """
+        row = self._conn.execute("SELECT payload FROM shows WHERE showdate = ?", (date,)).fetchone()
+        if row is None:
+            return None
+        setlist = [
+            SongPlay.from_api(json_codec.loads(payload)) for (payload,) in self._conn.execute(
+                "SELECT payload FROM setlist_rows WHERE showdate = ? ORDER BY position", (date,)
+            )
+        ]
+        return Show.from_api(json_codec.loads(row[0])), setlist
+
+    def find_shows(self, start: Optional[str] = None, end: Optional[str] = None) -> list:
+        """Mirrored shows (without setlists) dated between start and end inclusive, oldest first."""
+        return [
+            Show.from_api(json_codec.loads(payload)) for (payload,) in self._conn.execute(
+                "SELECT payload FROM shows WHERE showdate >= ? AND showdate <= ? ORDER BY showdate",
+                (start or '0000-00-00', end or '9999-99-99')
+            )
+        ]
+
+    def show_dates(self) -> list:
+        """Every mirrored show date, oldest first."""
+        return [date for (date,) in self._conn.execute("SELECT showdate FROM shows ORDER BY showdate")]
+
+    def iter_plays(self):
+        """Yields (showdate, songname, venuename, permalink) for every mirrored play in order."""
+        yield from self._conn.execute(
+            "SELECT showdate, songname, venuename, permalink FROM setlist_rows ORDER BY showdate, position"
+        )
+
+    def add_ingest_listener(self, callback):
+        """Registers callback(new_shows, new_rows), called after each ingest with the rows it added."""
+        self._listeners.append(callback)
+
+    def counts(self) -> dict:
+        shows = self._conn.execute("SELECT COUNT(*) FROM shows").fetchone()[0]
+        rows = self._conn.execute("SELECT COUNT(*) FROM setlist_rows").fetchone()[0]
+        return {"shows": shows, "setlist_rows": rows, "last_synced_date": self.last_synced_date}
+
+    def ingest(self, shows: list, setlist_rows: list, newer_than: Optional[str] = None) -> int:
+        """
+        Upserts Goose shows and setlist rows for final dates newer than
+        `newer_than`. Returns the number of shows ingested.
+        """
+        def wanted(item):
+            date = item.get('showdate')
+            return (
+                _is_goose(item) and date and is_past_date(date)
+                and (newer_than is None or date > newer_than)
+            )
+
+        new_shows = [show for show in shows or [] if wanted(show)]
+        new_rows = [row for row in setlist_rows or [] if wanted(row)]
+        if not new_shows:
+            return 0
+
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO shows (show_id, showdate, venuename, permalink, payload) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (show.get('show_id'), show['showdate'], show.get('venuename'), show.get('permalink'), json_codec.dumps(show))
+                    for show in new_shows
+                ]
+            )
+            self._conn.executemany(
+                "DELETE FROM setlist_rows WHERE show_id = ?", [(show.get('show_id'),) for show in new_shows]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO setlist_rows (row_key, show_id, showdate, songname, position, venuename, permalink, payload)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        _row_key(row), row.get('show_id'), row['showdate'], row.get('songname', ''),
+                        row.get('position'), row.get('venuename'), row.get('permalink'), json_codec.dumps(row)
+                    )
+                    for row in new_rows
+                ]
+            )
+            latest = max(show['showdate'] for show in new_shows)
+            if self.last_synced_date is None or latest > self.last_synced_date:
+                self._set_last_synced_date(latest)
+
+        new_shows.sort(key=lambda show: show['showdate'])
+        new_rows.sort(key=lambda row: (row['showdate'], row.get('position') or 0))
+        for callback in self._listeners:
+            callback(new_shows, new_rows)
+        return len(new_shows)
+
+    async def sync(self, full: bool = False) -> int:
+        """
+        Downloads shows and setlists from the API into the mirror.
+
+        A full sync walks every year since CATALOG_FIRST_YEAR. An incremental
+        sync only walks years from the last synced date onward and only keeps
+        shows newer than it. A year that fails to download stops the sync, so
+        the last synced date never moves past it and the next sync retries it.
+        Returns the number of shows ingested.
+        """
+        newer_than = None if full else self.last_synced_date
+        first_year = int(newer_than[:4]) if newer_than else CATALOG_FIRST_YEAR
+        current_year = datetime.date.today().year
+
+        total = 0
+        for year in range(first_year, current_year + 1):
+            try:
+                shows = await api_client.fetch(f"shows/showyear/{year}.json", use_cache=False)
+                setlist_rows = await api_client.fetch(f"setlists/showyear/{year}.json", use_cache=False)
+            except APIError as e:
+                logger.warning("Failed to sync %d, stopping at %s: %s", year, self.last_synced_date, e)
+                break
+            ingested = self.ingest(shows, setlist_rows, newer_than)
+            logger.info("%d: ingested %d show(s)", year, ingested)
+            total += ingested
+        logger.info("Sync complete: %d new show(s), %s", total, self.counts())
+        return total
+
+# Shared catalog used by the bot's command handlers
+catalog = Catalog()
+
+async def _run_cli(args):
+    await api_client.start()
+    try:
+        if args.command == 'sync':
+            await catalog.sync(full=args.full)
+        elif args.command == 'status':
+            print(catalog.counts())
+    finally:
+        await api_client.close()
+        catalog.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the local Goose show/setlist mirror.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    sync_parser = subparsers.add_parser('sync', help="Download new shows (use --full for the initial bulk load)")
+    sync_parser.add_argument('--full', action='store_true', help="Re-download the whole history")
+    subparsers.add_parser('status', help="Show mirror row counts and the last synced date")
+    configure_logging()
+    asyncio.run(_run_cli(parser.parse_args()))
@@ -0,0 +1,58 @@
+import hashlib
+import json
+import logging
+import os
+from discord import app_commands
+from config import COMMAND_SYNC_STATE_PATH
+
+logger = logging.getLogger(__name__)
+
+def _command_payload(command, tree: app_commands.CommandTree) -> dict:
+    # discord.py 2.4 added the tree argument (for localisation); 2.3 takes none
+    try:
+        return command.to_dict(tree)
+    except TypeError:
+        return command.to_dict()
+
+def command_tree_hash(tree: app_commands.CommandTree, application_id) -> str:
+    """Hash of the global command definitions as they would be sent to Discord."""
+    payload = sorted((_command_payload(command, tree) for command in tree.get_commands()), key=lambda command: command['name'])
+    encoded = json.dumps({"application_id": application_id, "commands": payload}, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+def _read_state(path: str):
+    try:
+        with open(path) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+async def sync_commands_if_changed(tree: app_commands.CommandTree, application_id,
+                                   state_path: str = COMMAND_SYNC_STATE_PATH) -> bool:
+    """
+    Syncs the command tree only when its definitions differ from the last
+    successful sync, which is recorded in state_path. Returns True if a sync
+    was performed. Delete the state file to force a sync. If the
+    definitions can't be hashed, syncs unconditionally.
+    """
+    try:
+        current = command_tree_hash(tree, application_id)
+    except Exception:
+        logger.exception("Could not hash command definitions; syncing the command tree")
+        synced = await tree.sync()
+        logger.info("Synced %d command(s)", len(synced))
+        return True
+    if _read_state(state_path) == current:
+        logger.info("Command definitions unchanged; skipping command tree sync")
+        return False
+
+    synced = await tree.sync()
+    logger.info("Synced %d command(s)", len(synced))
+    try:
+        tmp_path = f"{state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(current)
+        os.replace(tmp_path, state_path)
+    except OSError as e:
+        logger.warning("Could not record command tree hash in %s: %s", state_path, e)
+    return True
@@ -14,4 +14,130 @@ load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
 
 # Optional: API base URL (defaults to https://elgoose.net/api/v2)
-API_BASE_URL = os.getenv('API_BASE_URL', 'https://elgoose.net/api/v2') 
\ No newline at end of file
+API_BASE_URL = os.getenv('API_BASE_URL', 'https://elgoose.net/api/v2')
+
+# HTTP connection pool settings for the shared API client
+API_POOL_LIMIT = int(os.getenv('API_POOL_LIMIT', '20'))
+API_POOL_LIMIT_PER_HOST = int(os.getenv('API_POOL_LIMIT_PER_HOST', '10'))
+API_DNS_CACHE_TTL = int(os.getenv('API_DNS_CACHE_TTL', '300'))
+API_KEEPALIVE_TIMEOUT = float(os.getenv('API_KEEPALIVE_TIMEOUT', '30'))
+
+# Response decoding: request compressed bodies (gzip, or brotli when the Brotli
+# package is installed), and parse bodies of at least API_DECODE_THREAD_BYTES
+# (decompressed) in a worker thread instead of on the event loop; 0 disables it.
+API_COMPRESSION = os.getenv('API_COMPRESSION', 'true').lower() in ('1', 'true', 'yes')
+API_DECODE_THREAD_BYTES = int(os.getenv('API_DECODE_THREAD_BYTES', '262144'))
+
+# Resilience for upstream calls: per-request timeout, retries with jittered
+# exponential backoff for transient errors, a shared token-bucket rate limit
+# and a circuit breaker that fails fast (serving stale cache) while upstream is down.
+API_REQUEST_TIMEOUT = float(os.getenv('API_REQUEST_TIMEOUT', '10'))
+API_MAX_RETRIES = int(os.getenv('API_MAX_RETRIES', '2'))
+API_RETRY_BASE_DELAY = float(os.getenv('API_RETRY_BASE_DELAY', '0.5'))
+API_RETRY_MAX_DELAY = float(os.getenv('API_RETRY_MAX_DELAY', '5'))
+API_RATE_LIMIT_PER_SECOND = float(os.getenv('API_RATE_LIMIT_PER_SECOND', '5'))
+API_RATE_LIMIT_BURST = int(os.getenv('API_RATE_LIMIT_BURST', '10'))
+# Longest a request may queue for a rate-limit token; beyond it the request
+# fails fast (or is answered from stale cache) instead of growing the queue;
+# 0 lets requests queue without a bound.
+API_RATE_LIMIT_MAX_WAIT = float(os.getenv('API_RATE_LIMIT_MAX_WAIT', '1'))
+# Live tracker polls draw from their own token bucket so bulk fetches can't queue them.
+API_LIVE_RATE_LIMIT_PER_SECOND = float(os.getenv('API_LIVE_RATE_LIMIT_PER_SECOND', '1'))
+API_LIVE_RATE_LIMIT_BURST = int(os.getenv('API_LIVE_RATE_LIMIT_BURST', '4'))
+API_BREAKER_FAILURE_THRESHOLD = int(os.getenv('API_BREAKER_FAILURE_THRESHOLD', '5'))
+API_BREAKER_RESET_SECONDS = float(os.getenv('API_BREAKER_RESET_SECONDS', '30'))
+# How long past expiry a cached response may still be served while upstream is unavailable
+API_CACHE_MAX_STALE = float(os.getenv('API_CACHE_MAX_STALE', '86400'))
+
+# Response cache settings. Past show dates are cached without expiry;
+# today's/future dates use the short TTL and song lookups the medium TTL.
+# Set API_CACHE_PATH to a file path to enable the on-disk cache tier.
+API_CACHE_MAX_ENTRIES = int(os.getenv('API_CACHE_MAX_ENTRIES', '512'))
+API_CACHE_SHORT_TTL = float(os.getenv('API_CACHE_SHORT_TTL', '60'))
+API_CACHE_MEDIUM_TTL = float(os.getenv('API_CACHE_MEDIUM_TTL', '3600'))
+API_CACHE_PATH = os.getenv('API_CACHE_PATH') or None
+# Number of rendered setlist/song embeds kept for reuse
+EMBED_CACHE_SIZE = int(os.getenv('EMBED_CACHE_SIZE', '256'))
+
+# /setlists: concurrent show fetches, maximum shows per request, and how long
+# the page buttons stay active (seconds)
+SETLISTS_CONCURRENCY = int(os.getenv('SETLISTS_CONCURRENCY', '8'))
+SETLISTS_MAX_SHOWS = int(os.getenv('SETLISTS_MAX_SHOWS', '100'))
+SETLISTS_VIEW_TIMEOUT = float(os.getenv('SETLISTS_VIEW_TIMEOUT', '900'))
+
+# /gaps: songs need GAPS_MIN_PLAYS plays to be listed among the longest current
+# gaps (2 leaves out one-off covers) and BUSTOUT_MIN_PLAYS to count as being in
+# rotation for the bustout candidates.
+GAPS_MIN_PLAYS = int(os.getenv('GAPS_MIN_PLAYS', '2'))
+BUSTOUT_MIN_PLAYS = int(os.getenv('BUSTOUT_MIN_PLAYS', '5'))
+
+# /song comparisons: maximum songs per request and concurrent lookups
+SONG_COMPARE_MAX = int(os.getenv('SONG_COMPARE_MAX', '10'))
+SONG_COMPARE_CONCURRENCY = int(os.getenv('SONG_COMPARE_CONCURRENCY', '5'))
+
+# Local SQLite mirror of the show/setlist history (see catalog.py).
+# Run `python catalog.py sync --full` once to perform the initial bulk load.
+CATALOG_PATH = os.getenv('CATALOG_PATH', 'elgoose_catalog.sqlite3')
+CATALOG_FIRST_YEAR = int(os.getenv('CATALOG_FIRST_YEAR', '2014'))
+CATALOG_REFRESH_HOURS = float(os.getenv('CATALOG_REFRESH_HOURS', '6'))
+
+# Live tracker polling (see poll_scheduler.py). Polls slowly before the
+# first song, fast while songs are added, and backs off when unchanged.
+LIVE_POLL_SLOW_SECONDS = float(os.getenv('LIVE_POLL_SLOW_SECONDS', '300'))
+LIVE_POLL_FAST_SECONDS = float(os.getenv('LIVE_POLL_FAST_SECONDS', '60'))
+LIVE_POLL_MAX_SECONDS = float(os.getenv('LIVE_POLL_MAX_SECONDS', '300'))
+LIVE_IDLE_POLLS_BEFORE_BACKOFF = int(os.getenv('LIVE_IDLE_POLLS_BEFORE_BACKOFF', '5'))
+LIVE_BACKOFF_FACTOR = float(os.getenv('LIVE_BACKOFF_FACTOR', '1.5'))
+LIVE_ENCORE_STABLE_POLLS = int(os.getenv('LIVE_ENCORE_STABLE_POLLS', '10'))
+LIVE_REQUEST_BUDGET_PER_HOUR = int(os.getenv('LIVE_REQUEST_BUDGET_PER_HOUR', '120'))
+LIVE_MAX_HOURS = float(os.getenv('LIVE_MAX_HOURS', '6'))
+# Maximum concurrent message edits when fanning out to subscribed channels
+LIVE_FANOUT_CONCURRENCY = int(os.getenv('LIVE_FANOUT_CONCURRENCY', '5'))
+# Post a short "New song: ..." message to subscribed channels as songs are added
+LIVE_POST_SONG_UPDATES = os.getenv('LIVE_POST_SONG_UPDATES', 'false').lower() in ('1', 'true', 'yes') 
+# SQLite file where the live tracker checkpoints its state so a restart resumes
+# the same messages. Must be on storage that survives restarts; empty disables it.
+LIVE_CHECKPOINT_PATH = os.getenv('LIVE_CHECKPOINT_PATH', 'live_checkpoint.sqlite3')
+
+# Show-day scheduler (see show_calendar.py). The upcoming show calendar is
+# reloaded every SHOW_CALENDAR_REFRESH_HOURS; show data is prewarmed
+# LIVE_PREFETCH_MINUTES before LIVE_SHOW_START_TIME (HH:MM in the venue's
+# timezone), when live tracking starts in LIVE_AUTO_START_CHANNEL_IDS
+# (comma-separated; empty disables auto-start). Venues whose timezone can't be
+# derived from their location, and /live outside a scheduled show, use
+# LIVE_DEFAULT_TIMEZONE. From the prewarm until the show ends its data is
+# refetched every SHOW_DAY_REFRESH_SECONDS, which should stay below
+# API_CACHE_SHORT_TTL so the entries /setlist reads never expire. Refreshes
+# count against LIVE_REQUEST_BUDGET_PER_HOUR (which may space them further
+# apart) and pause while the live tracker follows the show.
+SHOW_CALENDAR_REFRESH_HOURS = float(os.getenv('SHOW_CALENDAR_REFRESH_HOURS', '24'))
+LIVE_SHOW_START_TIME = os.getenv('LIVE_SHOW_START_TIME', '19:00')
+LIVE_PREFETCH_MINUTES = float(os.getenv('LIVE_PREFETCH_MINUTES', '120'))
+LIVE_AUTO_START_CHANNEL_IDS = [int(value) for value in os.getenv('LIVE_AUTO_START_CHANNEL_IDS', '').split(',') if value.strip()]
+LIVE_DEFAULT_TIMEZONE = os.getenv('LIVE_DEFAULT_TIMEZONE', 'America/New_York')
+SHOW_DAY_REFRESH_SECONDS = float(os.getenv('SHOW_DAY_REFRESH_SECONDS', str(API_CACHE_SHORT_TTL * 0.75)))
+
+# File recording a hash of the slash command definitions last synced to Discord.
+# The command tree is only re-synced on startup when the definitions change.
+COMMAND_SYNC_STATE_PATH = os.getenv('COMMAND_SYNC_STATE_PATH', '.command_tree_hash')
+
+# Logging: LOG_LEVEL is DEBUG/INFO/WARNING/ERROR; LOG_FORMAT is "text" or "json"
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+# Optional Prometheus scrape endpoint (served at /metrics); disabled when METRICS_PORT is unset
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT')) if os.getenv('METRICS_PORT') else None
+
+# Tracing (see tracing.py): spans for commands, API calls and live polls.
+# Traces are exported when sampled (TRACE_SAMPLE_RATE) or slower than
+# TRACE_SLOW_SECONDS; TRACE_EXPORTER is "jsonl" (TRACE_JSONL_PATH), "otlp"
+# (OTLP/HTTP JSON to TRACE_OTLP_ENDPOINT) or empty to keep the last
+# TRACE_RECENT_SIZE traces in memory only, for /trace.
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0.1'))
+TRACE_SLOW_SECONDS = float(os.getenv('TRACE_SLOW_SECONDS', '1.0'))
+TRACE_RECENT_SIZE = int(os.getenv('TRACE_RECENT_SIZE', '50'))
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', '').lower()
+TRACE_JSONL_PATH = os.getenv('TRACE_JSONL_PATH', 'traces.jsonl')
+TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT', 'http://127.0.0.1:4318/v1/traces')
+TRACE_OTLP_FLUSH_SECONDS = float(os.getenv('TRACE_OTLP_FLUSH_SECONDS', '5'))
\ No newline at end of file
@@ -1,41 +1,92 @@
 import discord
 import datetime
-import html
+from typing import List
+from cache import MISS, ResponseCache
+from config import EMBED_CACHE_SIZE
+from models import Show
+from tracing import Trace
 
-def create_setlist_embed(show_data: dict, is_live: bool = False) -> discord.Embed:
+# Built embeds for popular shows and songs, shared by commands and the live
+# tracker. Entries never expire: the key is the full rendered content, so a
+# changed show simply produces a new key and the stale one ages out.
+render_cache = ResponseCache(EMBED_CACHE_SIZE)
+
+def _play_key(play_info: dict):
+    return (play_info['date'], play_info['venue'], play_info['url']) if play_info else None
+
+def _song_key(song_data: dict) -> tuple:
+    return (
+        'song', song_data['song_name'], song_data.get('song_url'), song_data['times_played'],
+        song_data.get('gap'), _play_key(song_data['first_play']), _play_key(song_data['last_play']),
+        _play_key(song_data.get('second_last_play')),
+    )
+
+def create_setlist_embed(show: Show, is_live: bool = False) -> discord.Embed:
+    """
+    Returns the setlist embed for a show, reusing a cached render when the
+    same content was rendered before. The returned embed is shared and must
+    not be modified.
+    """
+    key = ('setlist', show.content_key(), is_live)
+    embed = render_cache.get(key)
+    if embed is MISS:
+        embed = _render_setlist_embed(show, is_live)
+        render_cache.set(key, embed, None)
+    return embed
+
+def create_song_embed(song_data: dict) -> discord.Embed:
+    """
+    Returns the song statistics embed, reusing a cached render when the same
+    statistics were rendered before. The returned embed is shared and must
+    not be modified.
+    """
+    key = _song_key(song_data)
+    embed = render_cache.get(key)
+    if embed is MISS:
+        embed = _render_song_embed(song_data)
+        render_cache.set(key, embed, None)
+    return embed
+
+def create_song_comparison_embed(songs: List[dict], missing: List[str]) -> discord.Embed:
+    """
+    Returns one embed comparing several songs, reusing a cached render when
+    the same statistics were rendered before. The returned embed is shared
+    and must not be modified.
+    """
+    key = ('songs', tuple(_song_key(song_data) for song_data in songs), tuple(missing))
+    embed = render_cache.get(key)
+    if embed is MISS:
+        embed = _render_song_comparison_embed(songs, missing)
+        render_cache.set(key, embed, None)
+    return embed
+
+def _render_setlist_embed(show: Show, is_live: bool = False) -> discord.Embed:
     """Creates a standardized Discord embed for setlist information."""
-    date_str = show_data.get('showdate')
-    parsed_date = datetime.datetime.strptime(date_str, '%Y-%m-%d')
-    
-    venue_name = html.unescape(show_data.get('venuename', 'Unknown Venue'))
-    location = show_data.get('location', 'Unknown Location')
-    
-    permalink = show_data.get('permalink')
-    show_url = f"https://elgoose.net/setlists/{permalink}" if permalink else "https://elgoose.net"
+    parsed_date = datetime.datetime.strptime(show.showdate, '%Y-%m-%d')
 
     embed = discord.Embed(
         title=f"Goose - {parsed_date.strftime('%B %d, %Y')}",
-        url=show_url,
-        description=f"**{venue_name}**\n{location}",
+        url=show.url,
+        description=f"**{show.venue_name}**\n{show.location}",
         color=discord.Color.from_rgb(252, 186, 3)
     )
 
-    for set_info in show_data.get('sets', []):
-        embed.add_field(name=f"**{set_info['name']}:**", value=set_info['songs'] or "TBA", inline=False)
+    for set_block in show.sets:
+        embed.add_field(name=f"**{set_block.name}:**", value=set_block.songs or "TBA", inline=False)
     
-    if show_data.get('notes'):
-        embed.add_field(name="Show Notes:", value=show_data['notes'], inline=False)
+    if show.notes:
+        embed.add_field(name="Show Notes:", value=show.notes, inline=False)
     
-    if show_data.get('coach_notes'):
-        notes = "\n".join([f"[{n['number']}] {n['text']}" for n in show_data['coach_notes']])
+    if show.coach_notes:
+        notes = "\n".join([f"[{n.number}] {n.text}" for n in show.coach_notes])
         embed.add_field(name="Coach's Notes:", value=notes, inline=False)
 
     if is_live:
-        embed.set_footer(text="Live setlist tracking. Updates every 5 minutes.")
+        embed.set_footer(text="Live setlist tracking. Updates automatically as songs are added.")
     
     return embed 
 
-def create_song_embed(song_data: dict) -> discord.Embed:
+def _render_song_embed(song_data: dict) -> discord.Embed:
     """Creates a standardized Discord embed for song statistics."""
     
     first_play_info = song_data['first_play']
@@ -48,6 +99,9 @@ def create_song_embed(song_data: dict) -> discord.Embed:
     )
 
     embed.add_field(name="Total Times Played", value=str(song_data['times_played']), inline=False)
+
+    if song_data.get("gap") is not None:
+        embed.add_field(name="Current Gap", value=f"{song_data['gap']} show(s)", inline=False)
     
     embed.add_field(
         name="First Time Played", 
@@ -78,4 +132,109 @@ def create_song_embed(song_data: dict) -> discord.Embed:
             inline=False
         )
 
-    return embed 
\ No newline at end of file
+    return embed
+
+def _render_song_comparison_embed(songs: List[dict], missing: List[str]) -> discord.Embed:
+    """Creates a Discord embed with plays, last play and gap for each song."""
+    embed = discord.Embed(title="Song Comparison", color=discord.Color.from_rgb(252, 186, 3))
+
+    for song_data in songs:
+        last_play_info = song_data['last_play']
+        value = (
+            f"**Plays:** {song_data['times_played']}\n"
+            f"**Last:** [{last_play_info['date']}]({last_play_info['url']})\n"
+            f"{last_play_info['venue']}"
+        )
+        if song_data.get("gap") is not None:
+            value += f"\n**Gap:** {song_data['gap']} show(s)"
+        embed.add_field(name=song_data['song_name'], value=value, inline=True)
+
+    if missing:
+        embed.add_field(name="Not Found", value=", ".join(missing)[:1024], inline=False)
+
+    return embed
+
+def create_onthisday_embed(month: int, day: int, shows: List[Show]) -> discord.Embed:
+    """Lists every show played on a month-day, newest first."""
+    title_date = datetime.date(2000, month, day).strftime('%B %d')
+    embed = discord.Embed(title=f"Goose On This Day - {title_date}", color=discord.Color.from_rgb(252, 186, 3))
+    lines = [f"**{show.showdate[:4]}** - [{show.venue_name}]({show.url}), {show.location}" for show in shows]
+    description = ""
+    for index, line in enumerate(lines):
+        if len(description) + len(line) + 40 > 4096:
+            description += f"...and {len(lines) - index} more"
+            break
+        description += line + "\n"
+    embed.description = description or "Goose hasn't played a show on this day yet."
+    if shows:
+        embed.set_footer(text=f"{len(shows)} show(s)")
+    return embed
+
+def _gap_lines(rows: List[dict]) -> str:
+    lines = []
+    for row in rows:
+        last_play = row['last_play']
+        line = f"**{row['song_name']}**: {row['gap']} shows (last [{last_play['date']}]({last_play['url']})"
+        if row.get('average_gap') is not None:
+            line += f", usually every {row['average_gap']:.1f}"
+        lines.append(line + ")")
+    value = ""
+    for line in lines:
+        if len(value) + len(line) + 1 > 1024:
+            break
+        value += line + "\n"
+    return value or "None"
+
+def create_gaps_embed(longest: List[dict], bustouts: List[dict], total_shows: int) -> discord.Embed:
+    """Longest current gaps and bustout candidates from the play history."""
+    embed = discord.Embed(title="Goose Song Gaps", color=discord.Color.from_rgb(252, 186, 3))
+    embed.add_field(name="Longest Current Gaps", value=_gap_lines(longest), inline=False)
+    embed.add_field(name="Bustout Candidates", value=_gap_lines(bustouts), inline=False)
+    embed.set_footer(text=f"Gaps are counted in shows, across {total_shows} shows in the local history.")
+    return embed
+
+# Span attributes worth showing next to the span name in a trace breakdown
+_TRACE_ATTRIBUTES = ('endpoint', 'cache', 'status', 'hit', 'thread', 'subscribers', 'rows', 'attempt')
+
+def _trace_lines(trace: Trace) -> List[str]:
+    children = {}
+    for span in trace.spans[1:]:
+        children.setdefault(span.parent_id, []).append(span)
+    lines = []
+
+    def walk(span, depth):
+        duration = f"{span.duration * 1000:.0f}ms" if span.duration is not None else "running"
+        details = " ".join(f"{key}={span.attributes[key]}" for key in _TRACE_ATTRIBUTES if key in span.attributes)
+        line = f"{'  ' * depth}{span.name} {duration}"
+        if details:
+            line += f" ({details})"
+        if span.error:
+            line += f" !{span.error[:40]}"
+        lines.append(line)
+        for child in sorted(children.get(span.span_id, []), key=lambda child: child.start_time):
+            walk(child, depth + 1)
+
+    walk(trace.root, 0)
+    return lines
+
+def create_trace_embed(traces: List[Trace], slow_seconds: float) -> discord.Embed:
+    """Breakdown of each trace as an indented span tree, one field per trace."""
+    embed = discord.Embed(title="Recent Slow Interactions", color=discord.Color.dark_grey())
+    if not traces:
+        embed.description = "No traces recorded yet."
+        return embed
+    embed.set_footer(text=f"Slow means at least {slow_seconds:g}s. Trace ids match trace_id in logs and exports.")
+    for trace in traces:
+        body = ""
+        for line in _trace_lines(trace):
+            # Leave room for the code fence within the 1024-character field limit
+            if len(body) + len(line) + 1 > 1000:
+                body += "..."
+                break
+            body += line + "\n"
+        embed.add_field(
+            name=f"{trace.root.name} - {trace.duration * 1000:.0f}ms - {trace.trace_id[:12]}",
+            value=f"```\n{body}```",
+            inline=False,
+        )
+    return embed
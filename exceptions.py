@@ -1,3 +1,20 @@
+from typing import Optional
+
 class APIError(Exception):
     """Custom exception for API-related errors."""
-    pass 
\ No newline at end of file
+    pass
+
+class UpstreamUnavailableError(APIError):
+    """A transient upstream failure (timeout, network error, 5xx or 429) that is worth retrying."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class CircuitOpenError(UpstreamUnavailableError):
+    """Raised without contacting upstream while the circuit breaker is open."""
+    pass
+
+class RateLimitedError(UpstreamUnavailableError):
+    """Raised without contacting upstream when the rate limiter's queue is longer than the allowed wait."""
+    pass
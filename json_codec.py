@@ -0,0 +1,26 @@
+"""
+JSON encoding and decoding for API payloads.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise; both produce the same Python objects for elgoose.net payloads.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+def loads(data):
+    """Parses JSON from bytes or str. Raises ValueError on invalid input."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj) -> str:
+    """Serializes obj to a JSON string."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
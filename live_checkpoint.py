@@ -0,0 +1,76 @@
+import json
+import logging
+import sqlite3
+import time
+from typing import Optional
+from config import LIVE_CHECKPOINT_PATH
+
+logger = logging.getLogger(__name__)
+
+def _restore_key(key):
+    # Row keys are uniqueids or ('position', n, set) tuples; JSON turns the tuples into lists.
+    return tuple(key) if isinstance(key, list) else key
+
+class LiveCheckpointStore:
+    """
+    Persists the live tracker's state so a restarted process can resume
+    following the show without posting new messages.
+
+    A checkpoint records the show date, when tracking must end, the last
+    content hash, the processed setlist row keys, and for each subscriber
+    its channel id, message id and last delivered content hash.
+    """
+
+    def __init__(self, path: str = LIVE_CHECKPOINT_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS live_checkpoint ("
+            " id INTEGER PRIMARY KEY CHECK (id = 1),"
+            " saved_at REAL NOT NULL,"
+            " payload TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def save(self, show_date: str, end_time: float, fingerprint: Optional[str], row_keys: list,
+             subscriptions: list):
+        """subscriptions is a list of (key, channel_id, message_id, last_fingerprint) tuples."""
+        payload = {
+            "show_date": show_date,
+            "end_time": end_time,
+            "fingerprint": fingerprint,
+            "row_keys": row_keys,
+            "subscriptions": [
+                {"key": key, "channel_id": channel_id, "message_id": message_id, "fingerprint": last_fingerprint}
+                for key, channel_id, message_id, last_fingerprint in subscriptions
+            ],
+        }
+        self._conn.execute(
+            "INSERT OR REPLACE INTO live_checkpoint (id, saved_at, payload) VALUES (1, ?, ?)",
+            (time.time(), json.dumps(payload)),
+        )
+        self._conn.commit()
+
+    def load(self) -> Optional[dict]:
+        """Returns the saved checkpoint, or None if there is none or tracking should already have ended."""
+        row = self._conn.execute("SELECT payload FROM live_checkpoint WHERE id = 1").fetchone()
+        if row is None:
+            return None
+        try:
+            checkpoint = json.loads(row[0])
+        except ValueError as e:
+            logger.warning("Discarding unreadable live checkpoint: %s", e)
+            self.clear()
+            return None
+        if time.time() >= checkpoint["end_time"] or not checkpoint["subscriptions"]:
+            self.clear()
+            return None
+        checkpoint["row_keys"] = [_restore_key(key) for key in checkpoint["row_keys"]]
+        return checkpoint
+
+    def clear(self):
+        self._conn.execute("DELETE FROM live_checkpoint")
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
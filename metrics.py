@@ -0,0 +1,148 @@
+import bisect
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Tuple
+from aiohttp import web
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from cache hits up to slow upstream calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _labels_key(labels: dict) -> Tuple:
+    return tuple(sorted(labels.items()))
+
+def _format_labels(labels: Tuple) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{key}="{str(value).replace(chr(34), chr(39))}"' for key, value in labels)
+    return "{" + inner + "}"
+
+class Histogram:
+    """Cumulative-bucket latency histogram, Prometheus style."""
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+class MetricsRegistry:
+    """
+    In-process counters and histograms, plus collectors that report gauges
+    owned by other components (cache, coalescing, live tracker).
+    """
+
+    def __init__(self):
+        self.counters: Dict[Tuple[str, Tuple], float] = {}
+        self.histograms: Dict[Tuple[str, Tuple], Histogram] = {}
+        self._collectors: Dict[str, Callable[[], dict]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _labels_key(labels))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _labels_key(labels))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def register_collector(self, prefix: str, collect: Callable[[], dict]):
+        """Registers a callable returning {metric: number}; exported as `<prefix>_<metric>` gauges."""
+        self._collectors[prefix] = collect
+
+    def collect(self) -> Dict[str, dict]:
+        collected = {}
+        for prefix, collect in self._collectors.items():
+            try:
+                collected[prefix] = collect()
+            except Exception as e:
+                logger.warning("Metrics collector %s failed: %s", prefix, e)
+        return collected
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for (name, labels), value in sorted(self.counters.items()):
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+            cumulative = 0
+            for bound, bucket_count in zip(list(histogram.buckets) + ['+Inf'], histogram.counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        for prefix, values in self.collect().items():
+            for metric, value in values.items():
+                if isinstance(value, (int, float)):
+                    lines.append(f"{prefix}_{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+# Shared registry for the whole bot
+metrics = MetricsRegistry()
+
+def timed_command(func):
+    """Records latency and errors for a slash command handler, and traces it as the root of a new trace."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            with tracer.span(f"/{func.__name__}", new_trace=True, command=func.__name__):
+                return await func(*args, **kwargs)
+        except Exception:
+            metrics.inc("command_errors_total", command=func.__name__)
+            raise
+        finally:
+            metrics.observe("command_latency_seconds", time.perf_counter() - start, command=func.__name__)
+    return wrapper
+
+def endpoint_label(endpoint: str) -> str:
+    """Collapses an endpoint to its route, e.g. 'setlists/showdate/2024-01-01.json' -> 'setlists/showdate'."""
+    path = endpoint.split('?', 1)[0]
+    parts = path.split('/')
+    if len(parts) >= 3:
+        return "/".join(parts[:2])
+    return path.removesuffix('.json')
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Serves the registry in Prometheus text format at http://host:port/metrics."""
+    async def handle_metrics(request):
+        return web.Response(text=metrics.render_prometheus(), content_type='text/plain')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("Metrics endpoint listening on http://%s:%d/metrics", host, port)
+    return runner
@@ -0,0 +1,200 @@
+import html
+from typing import List, Optional, Tuple
+
+def _text(value) -> Optional[str]:
+    """Decodes HTML entities in an API string field, passing through None."""
+    return html.unescape(value) if isinstance(value, str) else value
+
+def _is_goose(item: dict) -> bool:
+    return item.get('artist', '').lower() == 'goose'
+
+# Fields of API rows that the bot reads (models, catalog and song index). The
+# API client drops every other field while decoding, so cached and mirrored
+# payloads hold only these; add a field here before reading it anywhere.
+SHOW_FIELDS = frozenset((
+    'artist', 'show_id', 'showdate', 'venuename', 'location', 'permalink', 'tourname',
+))
+SETLIST_ROW_FIELDS = frozenset((
+    'artist', 'show_id', 'showdate', 'venuename', 'permalink', 'uniqueid', 'position',
+    'settype', 'setnumber', 'songname', 'transition', 'footnote', 'shownotes',
+))
+SONG_FIELDS = frozenset(('name', 'songname'))
+
+def payload_fields(endpoint: str) -> Optional[frozenset]:
+    """The fields kept from each row of an endpoint's payload, or None to keep everything."""
+    route = endpoint.split('/', 1)[0].split('?', 1)[0]
+    if route == 'shows':
+        return SHOW_FIELDS
+    if route == 'setlists':
+        return SETLIST_ROW_FIELDS
+    if route == 'songs.json':
+        return SONG_FIELDS
+    return None
+
+def project_rows(rows, fields: frozenset):
+    """Copies each row of a list payload with only the given fields; other payloads pass through."""
+    if not isinstance(rows, list):
+        return rows
+    return [{key: row[key] for key in fields if key in row} if isinstance(row, dict) else row for row in rows]
+
+class Footnote:
+    """A numbered coach's note attached to one or more songs in a show."""
+    __slots__ = ('number', 'text')
+
+    def __init__(self, number: str, text: str):
+        self.number = number
+        self.text = text
+
+    def to_dict(self) -> dict:
+        return {"number": self.number, "text": self.text}
+
+class SongPlay:
+    """
+    One Goose setlist row, decoded once at ingestion.
+
+    Carries the show date, venue and permalink as well, so song history
+    lookups can use the same type as setlist processing.
+    """
+    __slots__ = (
+        'uniqueid', 'position', 'set_key', 'song_name', 'transition', 'footnote', 'shownotes',
+        'showdate', 'venue_name', 'permalink',
+    )
+
+    def __init__(self, uniqueid, position, set_key: str, song_name: str, transition: str,
+                 footnote: Optional[str], shownotes: Optional[str],
+                 showdate: Optional[str], venue_name: str, permalink: Optional[str]):
+        self.uniqueid = uniqueid
+        self.position = position
+        self.set_key = set_key
+        self.song_name = song_name
+        self.transition = transition
+        self.footnote = footnote
+        self.shownotes = shownotes
+        self.showdate = showdate
+        self.venue_name = venue_name
+        self.permalink = permalink
+
+    @classmethod
+    def from_api(cls, row: dict) -> "SongPlay":
+        settype = row.get('settype', '') or ''
+        setnumber = row.get('setnumber')
+        if settype.lower() in ['encore', 'e'] or str(setnumber).lower() == 'e':
+            set_key = 'Encore'
+        else:
+            set_key = f"Set {setnumber}"
+        return cls(
+            uniqueid=row.get('uniqueid'),
+            position=row.get('position'),
+            set_key=set_key,
+            song_name=_text(row.get('songname', '')) or '',
+            transition=(row.get('transition', '') or '').strip(),
+            footnote=_text(row.get('footnote')) or None,
+            shownotes=_text(row.get('shownotes')) or None,
+            showdate=row.get('showdate'),
+            venue_name=_text(row.get('venuename', 'Unknown Venue')),
+            permalink=row.get('permalink'),
+        )
+
+    def summary(self) -> dict:
+        """Date/venue/link summary used by the song statistics embed."""
+        return {
+            "date": self.showdate,
+            "venue": self.venue_name,
+            "url": f"https://elgoose.net/setlists/{self.permalink}"
+        }
+
+    @property
+    def key(self):
+        """Stable identity of the row across polls."""
+        if self.uniqueid is not None:
+            return self.uniqueid
+        return ('position', self.position, self.set_key)
+
+    @property
+    def signature(self) -> Tuple:
+        """The fields that affect how the row is rendered."""
+        return (self.song_name, self.set_key, self.transition, self.footnote, self.shownotes)
+
+class SetBlock:
+    """A rendered set (e.g. 'Set 1', 'Encore') of a show."""
+    __slots__ = ('name', 'songs')
+
+    def __init__(self, name: str, songs: str):
+        self.name = name
+        self.songs = songs
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "songs": self.songs}
+
+class Show:
+    """A Goose show, optionally with its processed setlist."""
+    __slots__ = (
+        'show_id', 'showdate', 'venue_name', 'location', 'permalink', 'sets', 'notes', 'coach_notes', 'tour_name',
+    )
+
+    def __init__(self, show_id, showdate: str, venue_name: str, location: str, permalink: Optional[str],
+                 sets: Optional[List[SetBlock]] = None, notes: Optional[str] = None,
+                 coach_notes: Optional[List[Footnote]] = None, tour_name: Optional[str] = None):
+        self.show_id = show_id
+        self.showdate = showdate
+        self.venue_name = venue_name
+        self.location = location
+        self.permalink = permalink
+        self.sets = sets or []
+        self.notes = notes
+        self.coach_notes = coach_notes or []
+        self.tour_name = tour_name
+
+    @classmethod
+    def from_api(cls, show: dict) -> "Show":
+        return cls(
+            show_id=show.get('show_id'),
+            showdate=show.get('showdate'),
+            venue_name=_text(show.get('venuename', 'Unknown Venue')),
+            location=_text(show.get('location', 'Unknown Location')),
+            permalink=show.get('permalink'),
+            tour_name=_text(show.get('tourname')) or None,
+        )
+
+    @property
+    def url(self) -> str:
+        return f"https://elgoose.net/setlists/{self.permalink}" if self.permalink else "https://elgoose.net"
+
+    def with_setlist(self, sets: List[SetBlock], notes: Optional[str], coach_notes: List[Footnote]) -> "Show":
+        """Returns a copy of the show carrying the given setlist; the base show is left untouched."""
+        return Show(self.show_id, self.showdate, self.venue_name, self.location, self.permalink,
+                    sets, notes, coach_notes, self.tour_name)
+
+    def content_key(self) -> Tuple:
+        """Hashable tuple of everything that is rendered, used as a render cache key."""
+        return (
+            self.showdate, self.venue_name, self.location, self.permalink,
+            tuple((set_block.name, set_block.songs) for set_block in self.sets),
+            self.notes,
+            tuple((note.number, note.text) for note in self.coach_notes),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "show_id": self.show_id,
+            "showdate": self.showdate,
+            "venuename": self.venue_name,
+            "location": self.location,
+            "permalink": self.permalink,
+            "sets": [set_block.to_dict() for set_block in self.sets],
+            "notes": self.notes,
+            "coach_notes": [note.to_dict() for note in self.coach_notes],
+            "tourname": self.tour_name,
+        }
+
+def decode_shows(shows) -> List[Show]:
+    """Decodes a shows/ API payload into Goose Show objects."""
+    if not shows or not isinstance(shows, list):
+        return []
+    return [Show.from_api(show) for show in shows if _is_goose(show)]
+
+def decode_setlist_rows(rows) -> List[SongPlay]:
+    """Decodes a setlists/ API payload into Goose SongPlay objects."""
+    if not rows or not isinstance(rows, list):
+        return []
+    return [SongPlay.from_api(row) for row in rows if _is_goose(row)]
@@ -0,0 +1,177 @@
+import html
+import logging
+from typing import Dict, List, Optional
+import numpy as np
+from models import Show
+
+logger = logging.getLogger(__name__)
+
+class _GrowableArray:
+    """int32 column with amortized appends; `values` is a view of the filled part."""
+    __slots__ = ('_data', '_size')
+
+    def __init__(self, capacity: int = 1024):
+        self._data = np.empty(capacity, dtype=np.int32)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._data[:self._size]
+
+    def append(self, value: int):
+        if self._size == len(self._data):
+            self._data = np.resize(self._data, len(self._data) * 2)
+        self._data[self._size] = value
+        self._size += 1
+
+class PlayHistory:
+    """
+    Column-oriented play history built from the local catalog.
+
+    Every mirrored play is one entry in two parallel int32 arrays (the show's
+    index in date order and the song's id), and each show's month-day is kept
+    as an MMDD integer. Catalog-wide questions such as "on this day" and
+    current gaps are then vectorized array operations rather than API
+    downloads. New shows are appended as they are ingested; the per-song
+    aggregates are recomputed lazily on the next query.
+    """
+
+    def __init__(self):
+        self.build_from([], [])
+
+    def __len__(self):
+        return len(self._play_show)
+
+    @property
+    def total_shows(self) -> int:
+        return len(self._shows)
+
+    def attach(self, catalog):
+        """Builds the history from the catalog and follows its future ingests."""
+        self.build(catalog)
+        catalog.add_ingest_listener(lambda shows, rows: self._on_ingest(catalog, shows, rows))
+
+    def build(self, catalog):
+        self.build_from(catalog.find_shows(), catalog.iter_plays())
+        logger.info("Play history holds %d plays of %d songs across %d shows",
+                    len(self), len(self._song_names), self.total_shows)
+
+    def build_from(self, shows: list, plays):
+        """shows are Show objects in date order; plays are (showdate, songname, ...) tuples."""
+        self._shows: List[Show] = []
+        self._show_index: Dict[str, int] = {}
+        self._show_monthday = _GrowableArray()
+        self._song_names: List[str] = []
+        self._song_ids: Dict[str, int] = {}
+        self._play_show = _GrowableArray()
+        self._play_song = _GrowableArray()
+        self._aggregates = None
+        for show in shows:
+            self._add_show(show)
+        for play in plays:
+            self._add_play(play[0], play[1])
+
+    def _on_ingest(self, catalog, new_shows: list, new_rows: list):
+        # Re-ingested history (e.g. a full sync) can't be appended; rebuild instead.
+        last_date = self._shows[-1].showdate if self._shows else None
+        if last_date is not None and any(show['showdate'] <= last_date for show in new_shows):
+            self.build(catalog)
+            return
+        for show in new_shows:
+            self._add_show(Show.from_api(show))
+        for row in new_rows:
+            self._add_play(row['showdate'], row.get('songname', ''))
+
+    def _add_show(self, show: Show):
+        if show.showdate in self._show_index:
+            return
+        self._show_index[show.showdate] = len(self._shows)
+        self._shows.append(show)
+        self._show_monthday.append(int(show.showdate[5:7]) * 100 + int(show.showdate[8:10]))
+        self._aggregates = None
+
+    def _add_play(self, showdate: str, songname: str):
+        show_index = self._show_index.get(showdate)
+        if not songname or show_index is None:
+            return
+        songname = html.unescape(songname)
+        key = songname.casefold()
+        song_id = self._song_ids.get(key)
+        if song_id is None:
+            song_id = self._song_ids[key] = len(self._song_names)
+            self._song_names.append(songname)
+        self._play_show.append(show_index)
+        self._play_song.append(song_id)
+        self._aggregates = None
+
+    def shows_on(self, month: int, day: int) -> List[Show]:
+        """Every show played on this month and day, newest first."""
+        indices = np.flatnonzero(self._show_monthday.values == month * 100 + day)
+        return [self._shows[index] for index in indices[::-1]]
+
+    def _song_aggregates(self) -> dict:
+        """Per-song play count, first and last show index, as arrays indexed by song id."""
+        if self._aggregates is None:
+            song_count = len(self._song_names)
+            play_song, play_show = self._play_song.values, self._play_show.values
+            first = np.full(song_count, np.iinfo(np.int32).max, dtype=np.int32)
+            last = np.full(song_count, -1, dtype=np.int32)
+            np.minimum.at(first, play_song, play_show)
+            np.maximum.at(last, play_song, play_show)
+            self._aggregates = {
+                "times_played": np.bincount(play_song, minlength=song_count),
+                "first": first,
+                "last": last,
+            }
+        return self._aggregates
+
+    def _gap_row(self, song_id: int, times_played: int, gap: int, average_gap: Optional[float]) -> dict:
+        last_show = self._shows[self._song_aggregates()["last"][song_id]]
+        return {
+            "song_name": self._song_names[song_id],
+            "times_played": int(times_played),
+            "gap": int(gap),
+            "average_gap": float(average_gap) if average_gap is not None else None,
+            "last_play": {"date": last_show.showdate, "venue": last_show.venue_name, "url": last_show.url},
+        }
+
+    def longest_gaps(self, limit: int = 10, min_plays: int = 1) -> List[dict]:
+        """Songs played at least min_plays times, by current gap (shows since their last play), longest first."""
+        if not self._song_names:
+            return []
+        aggregates = self._song_aggregates()
+        gaps = self.total_shows - 1 - aggregates["last"]
+        candidates = np.flatnonzero(aggregates["times_played"] >= min_plays)
+        # Stable sort on the negated gap keeps ties in first-seen order
+        top = candidates[np.argsort(-gaps[candidates], kind='stable')[:limit]]
+        return [self._gap_row(song_id, aggregates["times_played"][song_id], gaps[song_id], None) for song_id in top]
+
+    def bustout_candidates(self, limit: int = 10, min_plays: int = 5) -> List[dict]:
+        """
+        Songs in regular rotation (at least min_plays plays) whose current gap
+        most exceeds their average gap between plays, most overdue first.
+        """
+        if not self._song_names:
+            return []
+        aggregates = self._song_aggregates()
+        times_played = aggregates["times_played"]
+        gaps = self.total_shows - 1 - aggregates["last"]
+        candidates = np.flatnonzero(times_played >= max(min_plays, 2))
+        average_gaps = (aggregates["last"][candidates] - aggregates["first"][candidates]) / (times_played[candidates] - 1)
+        overdue = gaps[candidates] / np.maximum(average_gaps, 1.0)
+        mask = overdue > 1.0
+        candidates, average_gaps, overdue = candidates[mask], average_gaps[mask], overdue[mask]
+        order = np.argsort(-overdue, kind='stable')[:limit]
+        return [
+            self._gap_row(candidates[i], times_played[candidates[i]], gaps[candidates[i]], average_gaps[i])
+            for i in order
+        ]
+
+    def stats(self) -> dict:
+        return {"shows": self.total_shows, "songs": len(self._song_names), "plays": len(self)}
+
+# Shared history, built from the catalog during bot setup
+play_history = PlayHistory()
@@ -0,0 +1,105 @@
+import time
+from collections import deque
+from typing import Optional
+from models import Show
+from config import (
+    LIVE_POLL_SLOW_SECONDS,
+    LIVE_POLL_FAST_SECONDS,
+    LIVE_POLL_MAX_SECONDS,
+    LIVE_IDLE_POLLS_BEFORE_BACKOFF,
+    LIVE_BACKOFF_FACTOR,
+    LIVE_ENCORE_STABLE_POLLS,
+    LIVE_REQUEST_BUDGET_PER_HOUR,
+)
+
+# fetch_show_details makes one shows/ and one setlists/ request per poll
+REQUESTS_PER_POLL = 2
+
+def _song_count(show: Optional[Show]) -> int:
+    if not show:
+        return 0
+    return sum(1 for set_block in show.sets if set_block.songs)
+
+def _has_encore(show: Optional[Show]) -> bool:
+    if not show:
+        return False
+    return any(set_block.name == 'Encore' and set_block.songs for set_block in show.sets)
+
+class AdaptivePollScheduler:
+    """
+    Decides how long the live tracker waits between polls.
+
+    - Before the first song appears it polls slowly (pre-show).
+    - Once songs are being added it polls fast.
+    - After several unchanged polls it backs off geometrically up to a cap.
+    - Once an encore is present and unchanged for a few polls the show is
+      considered over and is_finished becomes True.
+    - A failed poll says nothing about the show, so it keeps the phase and
+      the unchanged-poll count as they were.
+
+    Every delay is stretched if needed so the tracker stays within the
+    per-hour upstream request budget.
+    """
+
+    def __init__(
+        self,
+        slow_interval: float = LIVE_POLL_SLOW_SECONDS,
+        fast_interval: float = LIVE_POLL_FAST_SECONDS,
+        max_interval: float = LIVE_POLL_MAX_SECONDS,
+        idle_polls_before_backoff: int = LIVE_IDLE_POLLS_BEFORE_BACKOFF,
+        backoff_factor: float = LIVE_BACKOFF_FACTOR,
+        encore_stable_polls: int = LIVE_ENCORE_STABLE_POLLS,
+        request_budget_per_hour: int = LIVE_REQUEST_BUDGET_PER_HOUR,
+        clock=time.monotonic,
+    ):
+        self.slow_interval = slow_interval
+        self.fast_interval = fast_interval
+        self.max_interval = max_interval
+        self.idle_polls_before_backoff = idle_polls_before_backoff
+        self.backoff_factor = backoff_factor
+        self.encore_stable_polls = encore_stable_polls
+        self.max_polls_per_hour = max(1, request_budget_per_hour // REQUESTS_PER_POLL)
+        self._clock = clock
+        self._poll_times = deque()
+        self.phase = "pre-show"
+        self.unchanged_polls = 0
+        self.is_finished = False
+
+    def observe(self, show_data: Optional[Show], changed: bool, failed: bool = False):
+        """Records the outcome of a poll."""
+        self._poll_times.append(self._clock())
+        if failed:
+            return
+        self.unchanged_polls = 0 if changed else self.unchanged_polls + 1
+
+        if _song_count(show_data) == 0:
+            self.phase = "pre-show"
+        elif _has_encore(show_data):
+            self.phase = "encore"
+            if self.unchanged_polls >= self.encore_stable_polls:
+                self.is_finished = True
+        else:
+            self.phase = "in-show"
+
+    def _base_delay(self) -> float:
+        if self.phase == "pre-show":
+            return self.slow_interval
+        backoff_steps = self.unchanged_polls - self.idle_polls_before_backoff
+        if backoff_steps <= 0:
+            return self.fast_interval
+        return min(self.max_interval, self.fast_interval * self.backoff_factor ** backoff_steps)
+
+    def _budget_delay(self) -> float:
+        """Seconds until another poll fits in the rolling one-hour budget."""
+        now = self._clock()
+        while self._poll_times and now - self._poll_times[0] >= 3600:
+            self._poll_times.popleft()
+        if len(self._poll_times) < self.max_polls_per_hour:
+            return 0.0
+        return 3600 - (now - self._poll_times[0])
+
+    def next_delay(self) -> float:
+        return max(self._base_delay(), self._budget_delay())
+
+    def describe(self) -> str:
+        return f"phase={self.phase} unchanged={self.unchanged_polls} next={self.next_delay():.0f}s"
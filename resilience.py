@@ -0,0 +1,141 @@
+import asyncio
+import random
+import time
+from typing import Optional
+from exceptions import RateLimitedError
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter shared by every upstream caller.
+
+    Allows bursts of up to `burst` requests, refilling at `rate` tokens per
+    second. Each caller reserves the next free token up front (the balance
+    may go negative) and then sleeps until it is due, so waiters are served
+    in arrival order without queueing on a lock. A caller whose token is
+    more than max_wait seconds away reserves nothing and gets
+    RateLimitedError, which keeps queueing delay bounded under load. A rate
+    of 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: int, max_wait: Optional[float] = None, clock=time.monotonic):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_wait = max_wait
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self.acquired = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.rejected = 0
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Takes one token, sleeping until it is due. Returns the seconds waited."""
+        if self.rate <= 0:
+            self.acquired += 1
+            return 0.0
+        self._refill()
+        wait = max(0.0, (1 - self._tokens) / self.rate)
+        if self.max_wait is not None and wait > self.max_wait:
+            self.rejected += 1
+            raise RateLimitedError(f"Too many requests to elgoose.net right now; try again in {wait:.0f}s", wait)
+        self._tokens -= 1
+        self.acquired += 1
+        if wait:
+            self.waits += 1
+            self.total_wait += wait
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # Hand the reserved token back so later callers don't wait for it
+                self._tokens += 1
+                raise
+        return wait
+
+    def stats(self) -> dict:
+        return {
+            "acquired": self.acquired,
+            "waits": self.waits,
+            "total_wait_seconds": self.total_wait,
+            "rejected": self.rejected,
+        }
+
+class CircuitBreaker:
+    """
+    Stops calling upstream after repeated transient failures.
+
+    closed:    requests flow normally; consecutive failures are counted.
+    open:      requests fail fast until reset_timeout has passed.
+    half-open: a single trial request is let through; success closes the
+               circuit, failure re-opens it for another reset_timeout.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock=time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        if self.state == self.OPEN and self._clock() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def release_trial(self):
+        """Frees the half-open trial slot when the request allow() let through was never sent."""
+        if self.state == self.HALF_OPEN:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = self._clock()
+            self._trial_in_flight = False
+
+    def retry_after(self) -> float:
+        """Seconds until the next trial request is allowed (0 unless open)."""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (self._clock() - self.opened_at))
+
+    def stats(self) -> dict:
+        return {
+            "open": int(self.state == self.OPEN),
+            "half_open": int(self.state == self.HALF_OPEN),
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+def backoff_delay(attempt: int, base: float, cap: float, rng=random) -> float:
+    """Exponential backoff with full jitter: uniform(0, min(cap, base * 2**attempt))."""
+    return rng.uniform(0, min(cap, base * 2 ** attempt))
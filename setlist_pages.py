@@ -0,0 +1,129 @@
+import asyncio
+import datetime
+import logging
+from typing import List, Optional
+import discord
+from api_client import api_client
+from catalog import catalog
+from config import SETLISTS_CONCURRENCY, SETLISTS_VIEW_TIMEOUT
+from embeds import create_setlist_embed
+from exceptions import APIError
+from models import Show, decode_shows
+
+logger = logging.getLogger(__name__)
+
+# Tours are searched in the mirror plus this many recent years from the API
+TOUR_RECENT_YEARS = 2
+
+async def _year_shows(year: int) -> List[Show]:
+    try:
+        return await api_client.fetch(f"shows/showyear/{year}.json", decode=decode_shows)
+    except APIError as e:
+        logger.warning("Could not fetch the %d show list: %s", year, e)
+        return []
+
+async def find_shows(start: Optional[str] = None, end: Optional[str] = None, tour: Optional[str] = None) -> List[Show]:
+    """
+    Base shows (without setlists) dated between start and end, optionally
+    limited to tours whose name contains `tour`, oldest first.
+
+    Final dates come from the local mirror; years the mirror may not cover
+    yet are filled in from the API's per-year show lists.
+    """
+    current_year = datetime.date.today().year
+    first_year = int(start[:4]) if start else current_year - TOUR_RECENT_YEARS + 1
+    last_year = int(end[:4]) if end else current_year
+
+    shows_by_date = {show.showdate: show for show in catalog.find_shows(start, end)}
+    mirrored_year = (catalog.last_synced_date or '0000')[:4]
+    api_years = [year for year in range(first_year, last_year + 1) if str(year) >= mirrored_year]
+    for year_shows in await asyncio.gather(*(_year_shows(year) for year in api_years)):
+        for show in year_shows:
+            if (start is None or show.showdate >= start) and (end is None or show.showdate <= end):
+                shows_by_date.setdefault(show.showdate, show)
+
+    shows = sorted(shows_by_date.values(), key=lambda show: show.showdate)
+    if tour:
+        needle = tour.casefold()
+        shows = [show for show in shows if show.tour_name and needle in show.tour_name.casefold()]
+    return shows
+
+def fetch_shows_bounded(dates: List[str], show_fetcher, concurrency: int = SETLISTS_CONCURRENCY) -> List[asyncio.Task]:
+    """
+    Starts show_fetcher(None, date) for every date with at most `concurrency`
+    in flight and returns the tasks in date order. Earlier dates are started
+    first, so the first pages are ready soonest.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(date):
+        async with semaphore:
+            try:
+                return await show_fetcher(None, date)
+            except APIError as e:
+                logger.warning("Could not fetch show details for %s: %s", date, e)
+                return None
+
+    return [asyncio.create_task(fetch(date)) for date in dates]
+
+class SetlistPager(discord.ui.View):
+    """
+    One setlist embed per page, backed by fetch tasks that are still running.
+
+    The first page is sent as soon as its show arrives; later pages wait for
+    their own show only if the user gets there before it has loaded.
+    """
+
+    def __init__(self, shows: List[Show], tasks: List[asyncio.Task], timeout: float = SETLISTS_VIEW_TIMEOUT):
+        super().__init__(timeout=timeout)
+        self.shows = shows
+        self.tasks = tasks
+        self.index = 0
+        self.message = None
+        self._update_buttons()
+
+    def current_embed(self) -> discord.Embed:
+        task = self.tasks[self.index]
+        # Fall back to the base show (venue and date only) if its details couldn't be fetched
+        loaded = task.done() and not task.cancelled() and task.exception() is None
+        show = (task.result() if loaded else None) or self.shows[self.index]
+        return create_setlist_embed(show)
+
+    def _update_buttons(self):
+        self.previous_page.disabled = self.index == 0
+        self.next_page.disabled = self.index >= len(self.shows) - 1
+        self.position.label = f"{self.index + 1} / {len(self.shows)}"
+
+    async def _show_page(self, interaction: discord.Interaction, index: int):
+        self.index = index
+        self._update_buttons()
+        task = self.tasks[index]
+        if task.done():
+            await interaction.response.edit_message(embed=self.current_embed(), view=self)
+            return
+        await interaction.response.defer()
+        await asyncio.wait([task])
+        await interaction.edit_original_response(embed=self.current_embed(), view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show_page(interaction, max(0, self.index - 1))
+
+    @discord.ui.button(label="1 / 1", style=discord.ButtonStyle.secondary, disabled=True)
+    async def position(self, interaction: discord.Interaction, button: discord.ui.Button):
+        pass
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show_page(interaction, min(len(self.shows) - 1, self.index + 1))
+
+    async def on_timeout(self):
+        for task in self.tasks:
+            task.cancel()
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
@@ -0,0 +1,143 @@
+from typing import List, Optional
+from models import Footnote, SetBlock, Show, SongPlay
+
+class SongDelta:
+    """A song that appeared since the previous poll."""
+    __slots__ = ('set_name', 'song', 'previous_song', 'previous_transition')
+
+    def __init__(self, set_name: str, song: str, previous_song: Optional[str], previous_transition: str):
+        self.set_name = set_name
+        self.song = song
+        self.previous_song = previous_song
+        self.previous_transition = previous_transition
+
+    def describe(self) -> str:
+        if self.previous_song is None:
+            return f"New song: {self.song} opens {self.set_name}"
+        transition = self.previous_transition
+        separator = f"{transition} " if transition == ',' else f" {transition or ','} "
+        return f"New song: {self.previous_song}{separator}{self.song} in {self.set_name}"
+
+class _Undo:
+    __slots__ = ('set_key', 'new_footnote', 'previous_show_notes')
+
+    def __init__(self, set_key, new_footnote, previous_show_notes):
+        self.set_key = set_key
+        self.new_footnote = new_footnote
+        self.previous_show_notes = previous_show_notes
+
+class IncrementalSetlist:
+    """
+    Setlist state kept by the live tracker between polls.
+
+    Each update only processes rows that weren't seen before. If upstream
+    edits or reorders rows that were already ingested (e.g. the last song's
+    transition changes once the next song is entered), the state rewinds to
+    the longest unchanged prefix and re-applies from there. to_show()
+    always matches what a fresh IncrementalSetlist would build from the same
+    rows in one update, which is also how /setlist processes a show.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._keys = []
+        self._signatures = []
+        self._undo: List[_Undo] = []
+        self._sets = {}          # set key -> list of rendered song pieces
+        self._set_songs = {}     # set key -> list of (song name, transition)
+        self._footnote_map = {}
+        self._coach_notes = []
+        self._show_notes = None
+        # Rows processed before a restart; they are rebuilt on the next update but not reported again
+        self._resumed_keys = set()
+
+    def resume(self, processed_keys: list):
+        """Starts from a checkpoint: rows with these keys were already reported before a restart."""
+        self.reset()
+        self._resumed_keys = set(processed_keys)
+
+    def processed_keys(self) -> list:
+        """Keys of the rows ingested so far, in order; the cursor saved in live checkpoints."""
+        return list(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def update(self, setlist: List[SongPlay]) -> List[SongDelta]:
+        """Ingests the latest decoded setlist and returns the songs that are new since the last update."""
+        setlist = setlist or []
+
+        common = 0
+        while (
+            common < len(self._keys) and common < len(setlist)
+            and setlist[common].key == self._keys[common]
+            and setlist[common].signature == self._signatures[common]
+        ):
+            common += 1
+
+        known_keys = set(self._keys) | self._resumed_keys
+        while len(self._keys) > common:
+            self._pop()
+
+        deltas = []
+        for play in setlist[common:]:
+            delta = self._push(play)
+            if play.key not in known_keys:
+                deltas.append(delta)
+        return deltas
+
+    def _push(self, play: SongPlay) -> SongDelta:
+        new_footnote = None
+        if footnote := play.footnote:
+            if footnote not in self._footnote_map:
+                note_number = str(len(self._coach_notes) + 1)
+                self._footnote_map[footnote] = note_number
+                self._coach_notes.append(Footnote(note_number, footnote))
+                new_footnote = footnote
+
+        set_key = play.set_key
+        pieces = self._sets.setdefault(set_key, [])
+        set_songs = self._set_songs.setdefault(set_key, [])
+
+        song_text = play.song_name
+        if footnote := play.footnote:
+            song_text += f"[{self._footnote_map.get(footnote, '?')}]"
+        pieces.append(song_text + play.transition + " ")
+
+        previous_song, previous_transition = set_songs[-1] if set_songs else (None, '')
+        set_songs.append((play.song_name, play.transition))
+
+        self._undo.append(_Undo(set_key, new_footnote, self._show_notes))
+        if notes := play.shownotes:
+            self._show_notes = notes
+
+        self._keys.append(play.key)
+        self._signatures.append(play.signature)
+        return SongDelta(set_key, play.song_name, previous_song, previous_transition)
+
+    def _pop(self):
+        undo = self._undo.pop()
+        self._keys.pop()
+        self._signatures.pop()
+        self._sets[undo.set_key].pop()
+        self._set_songs[undo.set_key].pop()
+        if not self._sets[undo.set_key]:
+            del self._sets[undo.set_key]
+            del self._set_songs[undo.set_key]
+        if undo.new_footnote is not None:
+            del self._footnote_map[undo.new_footnote]
+            self._coach_notes.pop()
+        self._show_notes = undo.previous_show_notes
+
+    def to_show(self, base_show: Show) -> Show:
+        """Merges the current state into a copy of the base show."""
+        formatted_sets = []
+        for name, pieces in self._sets.items():
+            cleaned_songs = "".join(pieces).strip()
+            if cleaned_songs.endswith(',') or cleaned_songs.endswith('>'):
+                cleaned_songs = cleaned_songs[:-1].strip()
+            formatted_sets.append(SetBlock(name, cleaned_songs))
+
+        return base_show.with_setlist(formatted_sets, self._show_notes, list(self._coach_notes))
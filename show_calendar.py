@@ -0,0 +1,245 @@
+import asyncio
+import datetime
+import logging
+import time
+from typing import List, Optional
+import discord
+import pytz
+from api_client import api_client
+from config import (
+    API_CACHE_SHORT_TTL,
+    LIVE_AUTO_START_CHANNEL_IDS,
+    LIVE_DEFAULT_TIMEZONE,
+    LIVE_MAX_HOURS,
+    LIVE_PREFETCH_MINUTES,
+    LIVE_REQUEST_BUDGET_PER_HOUR,
+    LIVE_SHOW_START_TIME,
+    SHOW_CALENDAR_REFRESH_HOURS,
+    SHOW_DAY_REFRESH_SECONDS,
+)
+from exceptions import APIError
+from models import Show, decode_shows
+from poll_scheduler import REQUESTS_PER_POLL
+
+logger = logging.getLogger(__name__)
+
+# Primary timezone of each US state (and DC), keyed by the postal code used in show locations
+STATE_TIMEZONES = {
+    'AL': 'America/Chicago', 'AK': 'America/Anchorage', 'AZ': 'America/Phoenix', 'AR': 'America/Chicago',
+    'CA': 'America/Los_Angeles', 'CO': 'America/Denver', 'CT': 'America/New_York', 'DC': 'America/New_York',
+    'DE': 'America/New_York', 'FL': 'America/New_York', 'GA': 'America/New_York', 'HI': 'Pacific/Honolulu',
+    'ID': 'America/Boise', 'IL': 'America/Chicago', 'IN': 'America/Indiana/Indianapolis', 'IA': 'America/Chicago',
+    'KS': 'America/Chicago', 'KY': 'America/New_York', 'LA': 'America/Chicago', 'ME': 'America/New_York',
+    'MD': 'America/New_York', 'MA': 'America/New_York', 'MI': 'America/Detroit', 'MN': 'America/Chicago',
+    'MS': 'America/Chicago', 'MO': 'America/Chicago', 'MT': 'America/Denver', 'NE': 'America/Chicago',
+    'NV': 'America/Los_Angeles', 'NH': 'America/New_York', 'NJ': 'America/New_York', 'NM': 'America/Denver',
+    'NY': 'America/New_York', 'NC': 'America/New_York', 'ND': 'America/Chicago', 'OH': 'America/New_York',
+    'OK': 'America/Chicago', 'OR': 'America/Los_Angeles', 'PA': 'America/New_York', 'RI': 'America/New_York',
+    'SC': 'America/New_York', 'SD': 'America/Chicago', 'TN': 'America/Chicago', 'TX': 'America/Chicago',
+    'UT': 'America/Denver', 'VT': 'America/New_York', 'VA': 'America/New_York', 'WA': 'America/Los_Angeles',
+    'WV': 'America/New_York', 'WI': 'America/Chicago', 'WY': 'America/Denver',
+}
+
+def show_timezone(show: Show) -> datetime.tzinfo:
+    """Timezone of the show's venue, from the state in 'City, ST'; LIVE_DEFAULT_TIMEZONE otherwise."""
+    state = (show.location or '').rsplit(',', 1)[-1].strip().upper()
+    return pytz.timezone(STATE_TIMEZONES.get(state, LIVE_DEFAULT_TIMEZONE))
+
+def _parse_start_time(value: str) -> datetime.time:
+    return datetime.datetime.strptime(value, '%H:%M').time()
+
+class ScheduledShow:
+    """An upcoming show and when, in absolute time, to prewarm and start tracking it."""
+    __slots__ = ('show', 'timezone', 'starts_at', 'refreshed_at', 'started')
+
+    def __init__(self, show: Show, start_time: datetime.time):
+        self.show = show
+        self.timezone = show_timezone(show)
+        local_date = datetime.datetime.strptime(show.showdate, '%Y-%m-%d').date()
+        self.starts_at = self.timezone.localize(datetime.datetime.combine(local_date, start_time)).timestamp()
+        # Last time the show's data was fetched past the cache; None until the prewarm
+        self.refreshed_at: Optional[float] = None
+        self.started = False
+
+    @property
+    def prewarm_at(self) -> float:
+        return self.starts_at - LIVE_PREFETCH_MINUTES * 60
+
+    @property
+    def ends_at(self) -> float:
+        return self.starts_at + LIVE_MAX_HOURS * 3600
+
+    def is_warm_window(self, now: float) -> bool:
+        """Whether the show's data should be kept in the cache right now."""
+        return self.prewarm_at <= now < self.ends_at
+
+    def is_today(self, now: float) -> bool:
+        """Whether it is the show's date where the show is happening."""
+        return datetime.datetime.fromtimestamp(now, self.timezone).strftime('%Y-%m-%d') == self.show.showdate
+
+class ShowDayScheduler:
+    """
+    Background scheduler for show days.
+
+    Loads the upcoming show calendar once every SHOW_CALENDAR_REFRESH_HOURS.
+    LIVE_PREFETCH_MINUTES before each show's start time (LIVE_SHOW_START_TIME
+    in the venue's timezone) it fetches the show through show_fetcher, and
+    from then until the show ends it refetches it past the cache every
+    refresh_seconds. Today's dates are only cached for API_CACHE_SHORT_TTL,
+    so refreshing more often than that keeps the entries /setlist reads
+    warm; with stored validators most refreshes are a 304. Refreshes use the
+    live tracker's rate limiter and are spaced to fit within
+    LIVE_REQUEST_BUDGET_PER_HOUR, and they pause while the tracker follows
+    the show, since its polls keep the same entries fresh. At the start time
+    it also starts the live tracker in the LIVE_AUTO_START_CHANNEL_IDS
+    channels.
+    """
+
+    def __init__(self, bot, tracker, show_fetcher, channel_ids: List[int] = LIVE_AUTO_START_CHANNEL_IDS,
+                 start_time: str = LIVE_SHOW_START_TIME, refresh_seconds: float = SHOW_DAY_REFRESH_SECONDS,
+                 request_budget_per_hour: int = LIVE_REQUEST_BUDGET_PER_HOUR, clock=time.time):
+        self.bot = bot
+        self.tracker = tracker
+        self.show_fetcher = show_fetcher
+        self.channel_ids = channel_ids
+        self.start_time = _parse_start_time(start_time)
+        self.refresh_seconds = max(1.0, refresh_seconds)
+        if self.refresh_seconds >= API_CACHE_SHORT_TTL:
+            logger.warning(
+                "SHOW_DAY_REFRESH_SECONDS (%.0fs) is not below API_CACHE_SHORT_TTL (%.0fs); "
+                "show-day cache entries will expire between refreshes", self.refresh_seconds, API_CACHE_SHORT_TTL
+            )
+        budget_seconds = 3600 * REQUESTS_PER_POLL / max(1, request_budget_per_hour)
+        if self.refresh_seconds < budget_seconds:
+            logger.info(
+                "Show-day refreshes spaced %.0fs apart to stay within LIVE_REQUEST_BUDGET_PER_HOUR (%d)",
+                budget_seconds, request_budget_per_hour
+            )
+            self.refresh_seconds = budget_seconds
+        self._clock = clock
+        self.schedule: List[ScheduledShow] = []
+        self._calendar_loaded_at = None
+        self.prewarms = 0
+        self.refreshes = 0
+        self.auto_starts = 0
+
+    def stats(self) -> dict:
+        return {
+            "scheduled_shows": len(self.schedule),
+            "prewarms": self.prewarms,
+            "refreshes": self.refreshes,
+            "auto_starts": self.auto_starts,
+        }
+
+    def current_show_date(self) -> Optional[str]:
+        """The date of a show happening today in its own timezone, if the calendar has one."""
+        now = self._clock()
+        for scheduled in self.schedule:
+            if scheduled.is_today(now) or scheduled.starts_at <= now < scheduled.ends_at:
+                return scheduled.show.showdate
+        return None
+
+    async def refresh_calendar(self):
+        """Reloads upcoming shows from this year's (and, late in the year, next year's) show list."""
+        today = datetime.date.today()
+        years = [today.year, today.year + 1] if today.month == 12 else [today.year]
+        upcoming = []
+        for year in years:
+            try:
+                shows = await api_client.fetch(f"shows/showyear/{year}.json", decode=decode_shows)
+            except APIError as e:
+                logger.warning("Could not load the %d show calendar: %s", year, e)
+                continue
+            upcoming.extend(show for show in shows if show.showdate >= (today - datetime.timedelta(days=1)).isoformat())
+
+        # Keep the progress of shows that were already scheduled
+        previous = {scheduled.show.showdate: scheduled for scheduled in self.schedule}
+        now = self._clock()
+        schedule = []
+        for show in sorted(upcoming, key=lambda show: show.showdate):
+            scheduled = previous.get(show.showdate) or ScheduledShow(show, self.start_time)
+            if scheduled.ends_at > now:
+                schedule.append(scheduled)
+        self.schedule = schedule
+        self._calendar_loaded_at = now
+        logger.info("Show calendar loaded: %d upcoming show(s)", len(schedule))
+
+    def _is_tracked(self, scheduled: ScheduledShow) -> bool:
+        return self.tracker.is_running and self.tracker.show_date == scheduled.show.showdate
+
+    def _refresh_due(self, scheduled: ScheduledShow, now: float) -> bool:
+        if not scheduled.is_warm_window(now) or self._is_tracked(scheduled):
+            return False
+        return scheduled.refreshed_at is None or now - scheduled.refreshed_at >= self.refresh_seconds
+
+    async def _refresh(self, scheduled: ScheduledShow):
+        """Fetches the show past the cache; the first call of the day is the prewarm."""
+        first = scheduled.refreshed_at is None
+        # Set before fetching so a failing upstream is retried on the next interval, not in a tight loop
+        scheduled.refreshed_at = self._clock()
+        try:
+            await self.show_fetcher(None, scheduled.show.showdate, refresh=True, live=True)
+        except APIError as e:
+            logger.warning("Show-day refresh for %s failed: %s", scheduled.show.showdate, e)
+            return
+        if first:
+            self.prewarms += 1
+            logger.info("Prewarmed show data for %s (%s)", scheduled.show.showdate, scheduled.show.venue_name)
+        else:
+            self.refreshes += 1
+            logger.debug("Refreshed show data for %s", scheduled.show.showdate)
+
+    async def _start(self, scheduled: ScheduledShow):
+        scheduled.started = True
+        if not self.channel_ids:
+            return
+        if self._is_tracked(scheduled):
+            return  # already resumed from a checkpoint or started by hand
+        for channel_id in self.channel_ids:
+            # Subscriptions are keyed by guild, so a cache miss must not fall back to the channel id
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
+                try:
+                    channel = await self.bot.fetch_channel(channel_id)
+                except discord.HTTPException as e:
+                    logger.warning("Auto-start for %s skipped channel %s: %s", scheduled.show.showdate, channel_id, e)
+                    continue
+            guild_id = channel.guild.id if getattr(channel, 'guild', None) else None
+            response = await self.tracker.start(channel_id, guild_id, scheduled.show.showdate)
+            logger.info("Auto-start for %s in %s: %s", scheduled.show.showdate, channel_id, response)
+        self.auto_starts += 1
+
+    def _next_wakeup(self, now: float) -> float:
+        candidates = [self._calendar_loaded_at + SHOW_CALENDAR_REFRESH_HOURS * 3600]
+        for scheduled in self.schedule:
+            if scheduled.is_warm_window(now):
+                if self._is_tracked(scheduled):
+                    # Check back in case tracking stops before the show ends
+                    candidates.append(now + self.refresh_seconds)
+                else:
+                    candidates.append(now if scheduled.refreshed_at is None else scheduled.refreshed_at + self.refresh_seconds)
+            elif now < scheduled.prewarm_at:
+                candidates.append(scheduled.prewarm_at)
+            if not scheduled.started and now < scheduled.ends_at:
+                candidates.append(scheduled.starts_at)
+        # Re-check at least hourly so clock jumps and long sleeps can't skip an event
+        return min(3600.0, max(1.0, min(candidates) - now))
+
+    async def run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                now = self._clock()
+                if self._calendar_loaded_at is None or now - self._calendar_loaded_at >= SHOW_CALENDAR_REFRESH_HOURS * 3600:
+                    await self.refresh_calendar()
+                for scheduled in self.schedule:
+                    if self._refresh_due(scheduled, now):
+                        await self._refresh(scheduled)
+                    if not scheduled.started and scheduled.starts_at <= now < scheduled.ends_at:
+                        await self._start(scheduled)
+                await asyncio.sleep(self._next_wakeup(self._clock()))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error in show-day scheduler")
+                await asyncio.sleep(300)
@@ -0,0 +1,110 @@
+import bisect
+import difflib
+import html
+import logging
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+from api_client import api_client
+from exceptions import APIError
+from song_stats import song_stats
+
+logger = logging.getLogger(__name__)
+
+MAX_SUGGESTIONS = 25  # Discord's limit on autocomplete choices
+
+class SongNameIndex:
+    """
+    In-memory index of known song names for /song autocomplete.
+
+    Lookups are pure CPU work over a sorted list, so suggestions come back
+    well inside Discord's autocomplete window. Matches are ranked as exact
+    prefix, then word prefix, then substring, then fuzzy (difflib).
+    """
+
+    def __init__(self, result_cache_size: int = 256):
+        self._names: List[str] = []
+        self._folded: List[str] = []
+        self._canonical = {}
+        self._result_cache: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._result_cache_size = result_cache_size
+
+    def __len__(self):
+        return len(self._names)
+
+    def build(self, names: Iterable[str]):
+        """Replaces the index contents with the given song names."""
+        canonical = {}
+        for name in names:
+            if name:
+                name = html.unescape(name).strip()
+                canonical.setdefault(name.casefold(), name)
+        pairs = sorted(canonical.items())
+        self._folded = [folded for folded, _ in pairs]
+        self._names = [name for _, name in pairs]
+        self._canonical = canonical
+        self._result_cache.clear()
+        logger.info("Indexed %d song names", len(self._names))
+
+    def canonical(self, song_name: str) -> Optional[str]:
+        """Returns the canonical spelling of an exactly matching name (any case), or None."""
+        return self._canonical.get(song_name.strip().casefold())
+
+    def suggest(self, query: str, limit: int = MAX_SUGGESTIONS) -> List[str]:
+        query = query.strip().casefold()
+        if not query:
+            return self._names[:limit]
+
+        if (cached := self._result_cache.get(query)) is not None:
+            self._result_cache.move_to_end(query)
+            return cached[:limit]
+
+        results = []
+        seen = set()
+
+        def add(index):
+            if index not in seen and len(results) < limit:
+                seen.add(index)
+                results.append(self._names[index])
+
+        # Names starting with the query form a contiguous run in the sorted list
+        start = bisect.bisect_left(self._folded, query)
+        for i in range(start, len(self._folded)):
+            if not self._folded[i].startswith(query) or len(results) >= limit:
+                break
+            add(i)
+
+        if len(results) < limit:
+            for i, folded in enumerate(self._folded):
+                if any(word.startswith(query) for word in folded.split()):
+                    add(i)
+        if len(results) < limit:
+            for i, folded in enumerate(self._folded):
+                if query in folded:
+                    add(i)
+        if len(results) < limit:
+            for match in difflib.get_close_matches(query, self._folded, n=limit, cutoff=0.6):
+                add(bisect.bisect_left(self._folded, match))
+
+        self._result_cache[query] = results
+        if len(self._result_cache) > self._result_cache_size:
+            self._result_cache.popitem(last=False)
+        return results
+
+# Shared index used by the /song autocomplete handler
+song_names = SongNameIndex()
+
+_api_song_names: List[str] = []
+
+async def refresh_song_names():
+    """Rebuilds the shared index from the API song list and the song stats index."""
+    global _api_song_names
+    try:
+        songs = await api_client.fetch("songs.json")
+        _api_song_names = [song.get('name') or song.get('songname') for song in songs or []]
+    except APIError as e:
+        logger.warning("Could not fetch song list, using indexed songs only: %s", e)
+    rebuild_song_names()
+
+def rebuild_song_names():
+    """Rebuilds the shared index from the last fetched API song list and the song stats index."""
+    song_names.build(_api_song_names + song_stats.song_names())
@@ -1,8 +1,11 @@
-import aiohttp
+import asyncio
 import urllib.parse
-import html
-
-API_BASE_URL = "https://elgoose.net/api/v2"
+from typing import List, Optional
+from api_client import api_client
+from config import SONG_COMPARE_CONCURRENCY, SONG_COMPARE_MAX
+from song_stats import song_stats
+from exceptions import APIError, UpstreamUnavailableError
+from models import decode_setlist_rows
 
 def format_song_name(song_name: str) -> str:
     """
@@ -13,6 +16,20 @@ def format_song_name(song_name: str) -> str:
     formatted_words = [word if word in exceptions else word.capitalize() for word in words]
     return ' '.join(formatted_words)
 
+def parse_song_list(text: str, limit: int = SONG_COMPARE_MAX) -> List[str]:
+    """
+    Splits a comma-separated list of song names, dropping blanks and
+    duplicates (any case). Returns at most `limit` names.
+    """
+    names = []
+    seen = set()
+    for name in text.split(','):
+        name = name.strip()
+        if name and name.casefold() not in seen:
+            seen.add(name.casefold())
+            names.append(name)
+    return names[:limit]
+
 async def get_song_info(song_name: str) -> dict:
     """
     Fetches and processes song statistics from the ElGoose.net API.
@@ -22,62 +39,59 @@ async def get_song_info(song_name: str) -> dict:
 
     Returns:
         A dictionary containing the song's play count, first play, and last play details.
-        Returns None if the song is not found or an error occurs.
+        Returns None if the song is not found.
+
+    Raises:
+        UpstreamUnavailableError: elgoose.net is rate limited or down and
+        nothing usable is cached, so "not found" would be a guess.
     """
+    # Prefer the precomputed stats index; fall back to the API for songs it doesn't know yet.
+    if indexed := song_stats.get_song_info(song_name):
+        return indexed
+
     encoded_song_name = urllib.parse.quote_plus(song_name)
-    url = f"{API_BASE_URL}/setlists/songname/{encoded_song_name}.json?order_by=showdate&direction=asc"
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            if response.status != 200:
-                # Log error or handle non-200 responses
-                return None
-            
-            data = await response.json()
-
-            if data.get("error") or not data.get("data"):
-                return None  # Song not found or API error
-
-            all_plays = data["data"]
-            
-            # Filter for Goose plays only
-            goose_plays = [play for play in all_plays if play.get('artist', '').lower() == 'goose']
-            
-            if not goose_plays:
-                return None # No Goose plays found for this song
-
-            times_played = len(goose_plays)
-            
-            first_play = goose_plays[0]
-            last_play = goose_plays[-1]
-            second_last_play = goose_plays[-2] if times_played > 1 else None
-
-            song_name = html.unescape(first_play.get("songname", "Unknown Song"))
-            song_slug = song_name.lower().replace(' ', '-')
-            song_url = f"https://elgoose.net/song/{song_slug}" if song_slug else None
-
-            song_info = {
-                "song_name": song_name,
-                "song_url": song_url,
-                "times_played": times_played,
-                "first_play": {
-                    "date": first_play.get("showdate"),
-                    "venue": html.unescape(first_play.get("venuename", "Unknown Venue")),
-                    "url": f"https://elgoose.net/setlists/{first_play.get('permalink')}"
-                },
-                "last_play": {
-                    "date": last_play.get("showdate"),
-                    "venue": html.unescape(last_play.get("venuename", "Unknown Venue")),
-                    "url": f"https://elgoose.net/setlists/{last_play.get('permalink')}"
-                },
-                "second_last_play": None
-            }
-
-            if second_last_play:
-                song_info["second_last_play"] = {
-                    "date": second_last_play.get("showdate"),
-                    "venue": html.unescape(second_last_play.get("venuename", "Unknown Venue")),
-                    "url": f"https://elgoose.net/setlists/{second_last_play.get('permalink')}"
-                }
-            
-            return song_info 
\ No newline at end of file
+    endpoint = f"setlists/songname/{encoded_song_name}.json?order_by=showdate&direction=asc"
+
+    try:
+        goose_plays = await api_client.fetch(endpoint, decode=decode_setlist_rows)
+    except UpstreamUnavailableError:
+        raise
+    except APIError:
+        return None  # Song not found
+
+    if not goose_plays:
+        return None # No Goose plays found for this song
+
+    times_played = len(goose_plays)
+
+    first_play = goose_plays[0]
+    last_play = goose_plays[-1]
+    second_last_play = goose_plays[-2] if times_played > 1 else None
+
+    song_name = first_play.song_name or "Unknown Song"
+    song_slug = song_name.lower().replace(' ', '-')
+    song_url = f"https://elgoose.net/song/{song_slug}" if song_slug else None
+
+    return {
+        "song_name": song_name,
+        "song_url": song_url,
+        "times_played": times_played,
+        "first_play": first_play.summary(),
+        "last_play": last_play.summary(),
+        "second_last_play": second_last_play.summary() if second_last_play else None
+    }
+
+async def get_songs_info(song_names: List[str], concurrency: int = SONG_COMPARE_CONCURRENCY) -> List[Optional[dict]]:
+    """
+    Looks up several songs concurrently, with at most `concurrency` lookups
+    in flight. Returns one result per name, in order, None where get_song_info
+    found nothing. Raises UpstreamUnavailableError if any lookup could not be
+    answered.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def lookup(song_name):
+        async with semaphore:
+            return await get_song_info(song_name)
+
+    return await asyncio.gather(*(lookup(song_name) for song_name in song_names))
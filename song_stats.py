@@ -0,0 +1,132 @@
+import html
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class SongPlayRef:
+    """Where and when a single play happened."""
+    __slots__ = ('date', 'venue', 'permalink')
+
+    def __init__(self, date: str, venue: str, permalink: Optional[str]):
+        self.date = date
+        self.venue = venue
+        self.permalink = permalink
+
+    def to_dict(self) -> dict:
+        return {
+            "date": self.date,
+            "venue": self.venue,
+            "url": f"https://elgoose.net/setlists/{self.permalink}"
+        }
+
+class SongStats:
+    """Compact per-song record: play count, first/last/previous play and the show index of the last play."""
+    __slots__ = ('song_name', 'times_played', 'first_play', 'last_play', 'previous_play', 'last_show_index')
+
+    def __init__(self, song_name: str):
+        self.song_name = song_name
+        self.times_played = 0
+        self.first_play: Optional[SongPlayRef] = None
+        self.last_play: Optional[SongPlayRef] = None
+        self.previous_play: Optional[SongPlayRef] = None
+        self.last_show_index = -1
+
+    def record(self, play: SongPlayRef, show_index: int):
+        self.times_played += 1
+        if self.first_play is None:
+            self.first_play = play
+        self.previous_play = self.last_play
+        self.last_play = play
+        self.last_show_index = show_index
+
+class SongStatsIndex:
+    """
+    In-memory index of per-song statistics built from the local catalog.
+
+    Built once from the full setlist history, then kept current by applying
+    the rows of each newly ingested show, so /song is a dict lookup instead
+    of a full play-history download.
+    """
+
+    def __init__(self):
+        self._songs: Dict[str, SongStats] = {}
+        self._show_index: Dict[str, int] = {}
+        self.last_date: Optional[str] = None
+
+    def __len__(self):
+        return len(self._songs)
+
+    @property
+    def total_shows(self) -> int:
+        return len(self._show_index)
+
+    def attach(self, catalog):
+        """Builds the index from the catalog and follows its future ingests."""
+        self.build(catalog)
+        catalog.add_ingest_listener(lambda shows, rows: self._on_ingest(catalog, shows, rows))
+
+    def build(self, catalog):
+        self._songs = {}
+        self._show_index = {}
+        self.last_date = None
+        for date in catalog.show_dates():
+            self._add_show(date)
+        for showdate, songname, venuename, permalink in catalog.iter_plays():
+            self._add_play(showdate, songname, venuename, permalink)
+        logger.info("Indexed %d songs across %d shows", len(self._songs), self.total_shows)
+
+    def _on_ingest(self, catalog, new_shows: list, new_rows: list):
+        # Re-ingested history (e.g. a full sync) can't be applied on top; rebuild instead.
+        if self.last_date is not None and any(show['showdate'] <= self.last_date for show in new_shows):
+            self.build(catalog)
+            return
+        for show in new_shows:
+            self._add_show(show['showdate'])
+        for row in new_rows:
+            self._add_play(row['showdate'], row.get('songname', ''), row.get('venuename'), row.get('permalink'))
+
+    def _add_show(self, date: str):
+        if date not in self._show_index:
+            self._show_index[date] = len(self._show_index)
+            self.last_date = date
+
+    def _add_play(self, showdate: str, songname: str, venuename: Optional[str], permalink: Optional[str]):
+        if not songname or showdate not in self._show_index:
+            return
+        songname = html.unescape(songname)
+        key = songname.casefold()
+        stats = self._songs.get(key)
+        if stats is None:
+            stats = self._songs[key] = SongStats(songname)
+        play = SongPlayRef(showdate, html.unescape(venuename or "Unknown Venue"), permalink)
+        stats.record(play, self._show_index[showdate])
+
+    def song_names(self) -> list:
+        return [stats.song_name for stats in self._songs.values()]
+
+    def get(self, song_name: str) -> Optional[SongStats]:
+        return self._songs.get(song_name.casefold())
+
+    def gap(self, stats: SongStats) -> int:
+        """Number of shows played since the song was last played."""
+        return self.total_shows - 1 - stats.last_show_index
+
+    def get_song_info(self, song_name: str) -> Optional[dict]:
+        """Returns the same structure as song_info.get_song_info, or None if the song isn't indexed."""
+        stats = self.get(song_name)
+        if stats is None:
+            return None
+        song_slug = stats.song_name.lower().replace(' ', '-')
+        return {
+            "song_name": stats.song_name,
+            "song_url": f"https://elgoose.net/song/{song_slug}" if song_slug else None,
+            "times_played": stats.times_played,
+            "first_play": stats.first_play.to_dict(),
+            "last_play": stats.last_play.to_dict(),
+            "second_last_play": stats.previous_play.to_dict() if stats.previous_play else None,
+            "gap": self.gap(stats),
+        }
+
+# Shared index, built from the catalog during bot setup
+song_stats = SongStatsIndex()
@@ -0,0 +1,6 @@
+import os
+
+# Importing the bot modules reads config.py; keep it off the real token and the on-disk caches.
+os.environ.setdefault('DISCORD_TOKEN', 'test')
+os.environ.setdefault('API_CACHE_PATH', '')
+os.environ.setdefault('CATALOG_PATH', ':memory:')
@@ -0,0 +1,29 @@
+import asyncio
+import catalog as catalog_module
+from catalog import Catalog
+from exceptions import APIError
+
+def goose_show(show_id: int, showdate: str) -> dict:
+    return {"show_id": show_id, "showdate": showdate, "artist": "Goose", "venuename": "Venue", "permalink": f"show-{show_id}"}
+
+def test_failed_year_stops_sync_before_the_cursor_passes_it(monkeypatch):
+    shows_by_year = {2020: [goose_show(1, "2020-06-01")], 2021: [goose_show(2, "2021-06-01")],
+                     2022: [goose_show(3, "2022-06-01")]}
+    failing_years = {2021}
+
+    async def fetch(endpoint, use_cache=True):
+        year = int(endpoint.split('/')[-1].removesuffix('.json'))
+        if year in failing_years:
+            raise APIError("HTTP 500")
+        return shows_by_year.get(year, []) if endpoint.startswith("shows/") else []
+
+    monkeypatch.setattr(catalog_module, "CATALOG_FIRST_YEAR", 2020)
+    monkeypatch.setattr(catalog_module.api_client, "fetch", fetch)
+    catalog = Catalog(":memory:")
+    assert asyncio.run(catalog.sync()) == 1
+    assert catalog.last_synced_date == "2020-06-01"
+
+    # Once 2021 downloads again, the next incremental sync picks it up along with the later years
+    failing_years.clear()
+    assert asyncio.run(catalog.sync()) == 2
+    assert catalog.last_synced_date == "2022-06-01"
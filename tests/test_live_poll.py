@@ -0,0 +1,28 @@
+import asyncio
+import ElGooseDiscord as bot_module
+from exceptions import APIError
+from LiveSetlist import LiveSetlist
+
+SHOW_DATE = "2024-06-01"
+
+def poll_with(monkeypatch, shows_outcome) -> LiveSetlist:
+    """Runs one live poll whose shows/showdate request returns (or raises) shows_outcome."""
+    async def fetch_api_data(endpoint, decode=None, refresh=False, live=False):
+        if endpoint.startswith("shows/"):
+            if isinstance(shows_outcome, Exception):
+                raise shows_outcome
+            return shows_outcome
+        return []
+
+    monkeypatch.setattr(bot_module, "fetch_api_data", fetch_api_data)
+    tracker = LiveSetlist(None, bot_module.fetch_show_parts)
+    assert asyncio.run(tracker._update_setlist(SHOW_DATE)) is None
+    return tracker
+
+def test_failed_show_request_counts_as_failed_poll(monkeypatch):
+    tracker = poll_with(monkeypatch, APIError("HTTP 500"))
+    assert tracker.poll_errors == 1
+
+def test_date_without_show_is_not_a_failed_poll(monkeypatch):
+    tracker = poll_with(monkeypatch, [])
+    assert tracker.poll_errors == 0
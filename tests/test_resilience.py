@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from api_client import APIClient
+from cache import MISS, ResponseCache
+from exceptions import CircuitOpenError, RateLimitedError, UpstreamUnavailableError
+from resilience import CircuitBreaker, TokenBucket
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_client(clock: FakeClock, outcomes: list, rate: float = 0.01) -> APIClient:
+    """A client whose requests return (or raise) the given outcomes in order instead of touching the network."""
+    client = APIClient(
+        base_url="http://upstream.invalid", cache=ResponseCache(16), max_retries=0,
+        limiter=TokenBucket(rate, 1, max_wait=0.5, clock=clock), breaker=CircuitBreaker(1, 30, clock=clock),
+    )
+
+    async def fetch_uncached(endpoint, decode=None):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome, MISS
+
+    client._fetch_uncached = fetch_uncached
+    return client
+
+def test_token_bucket_rejects_without_reserving():
+    clock = FakeClock()
+    bucket = TokenBucket(1, 1, max_wait=0.5, clock=clock)
+    assert asyncio.run(bucket.acquire()) == 0.0
+    with pytest.raises(RateLimitedError):
+        asyncio.run(bucket.acquire())
+    clock.now += 1
+    # The rejected call didn't take a token, so one full second refills exactly one
+    assert asyncio.run(bucket.acquire()) == 0.0
+    assert bucket.stats()["rejected"] == 1
+
+def test_rate_limited_half_open_trial_does_not_wedge_the_breaker():
+    clock = FakeClock()
+    client = make_client(clock, [UpstreamUnavailableError("502"), ["ok"]])
+
+    async def scenario():
+        with pytest.raises(UpstreamUnavailableError):
+            await client.fetch("songs.json", use_cache=False)
+        assert client.breaker.state == CircuitBreaker.OPEN
+
+        # The breaker is ready for a trial, but the limiter has no token for it yet
+        clock.now += 30
+        with pytest.raises(RateLimitedError):
+            await client.fetch("songs.json", use_cache=False)
+        assert client.breaker.state == CircuitBreaker.HALF_OPEN
+
+        clock.now += 100
+        assert await client.fetch("songs.json", use_cache=False) == ["ok"]
+        assert client.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+def test_open_breaker_fails_fast_without_spending_tokens():
+    clock = FakeClock()
+    client = make_client(clock, [UpstreamUnavailableError("502")], rate=1)
+
+    async def scenario():
+        with pytest.raises(UpstreamUnavailableError):
+            await client.fetch("songs.json", use_cache=False)
+        clock.now += 1
+        with pytest.raises(CircuitOpenError):
+            await client.fetch("songs.json", use_cache=False)
+        assert client.limiter.stats()["acquired"] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,28 @@
+import asyncio
+from models import Show
+from setlist_pages import SetlistPager, fetch_shows_bounded
+
+SHOWS = [
+    Show(1, "2023-12-30", "Madison Square Garden", "New York, NY", "goose-december-30-2023"),
+    Show(2, "2023-12-31", "Madison Square Garden", "New York, NY", "goose-december-31-2023"),
+]
+
+def test_failed_prefetch_pages_show_the_base_show():
+    async def show_fetcher(show_id, date):
+        if date == "2023-12-31":
+            raise ValueError("malformed payload")
+        return SHOWS[0]
+
+    async def page_titles():
+        tasks = fetch_shows_bounded([show.showdate for show in SHOWS], show_fetcher)
+        await asyncio.wait(tasks)
+        pager = SetlistPager(SHOWS, tasks)
+        titles = []
+        for index in range(len(SHOWS)):
+            pager.index = index
+            titles.append(pager.current_embed().title)
+        pager.stop()
+        return titles
+
+    first, second = asyncio.run(page_titles())
+    assert (first, second) == ("Goose - December 30, 2023", "Goose - December 31, 2023")
@@ -0,0 +1,120 @@
+import random
+import pytest
+from models import Footnote, SetBlock, Show, SongPlay
+from setlist_state import IncrementalSetlist
+
+BASE_SHOW = Show(1, "2023-12-31", "Madison Square Garden", "New York, NY", "goose-december-31-2023")
+
+SONGS = ["Arcadia", "Hungersite", "Hot Tea", "Arrow", "Madhuvan", "Tumble", "Dripfield", "Echo of a Rose"]
+SETS = ["Set 1", "Set 2", "Encore"]
+TRANSITIONS = ["", ",", ">", "->"]
+FOOTNOTES = [None, None, None, "With horns", "Debut"]
+SHOWNOTES = [None, None, "Soundcheck: Arcadia."]
+
+def play(uniqueid, set_key="Set 1", song="Arcadia", transition=",", footnote=None, shownotes=None) -> SongPlay:
+    return SongPlay(uniqueid, uniqueid, set_key, song, transition, footnote, shownotes,
+                    BASE_SHOW.showdate, BASE_SHOW.venue_name, BASE_SHOW.permalink)
+
+def random_play(rng: random.Random, uniqueid) -> SongPlay:
+    return play(uniqueid, rng.choice(SETS), rng.choice(SONGS), rng.choice(TRANSITIONS),
+                rng.choice(FOOTNOTES), rng.choice(SHOWNOTES))
+
+def full_rebuild(rows) -> dict:
+    """Independent batch rendering of a whole setlist, the reference the incremental state must match."""
+    footnote_map, coach_notes = {}, []
+    for row in rows:
+        if row.footnote and row.footnote not in footnote_map:
+            footnote_map[row.footnote] = str(len(coach_notes) + 1)
+            coach_notes.append(Footnote(footnote_map[row.footnote], row.footnote))
+    sets, show_notes = {}, None
+    for row in rows:
+        song_text = row.song_name + (f"[{footnote_map[row.footnote]}]" if row.footnote else "")
+        sets.setdefault(row.set_key, []).append(song_text + row.transition + " ")
+        show_notes = row.shownotes or show_notes
+    formatted_sets = []
+    for name, pieces in sets.items():
+        songs = "".join(pieces).strip()
+        if songs.endswith(',') or songs.endswith('>'):
+            songs = songs[:-1].strip()
+        formatted_sets.append(SetBlock(name, songs))
+    return BASE_SHOW.with_setlist(formatted_sets, show_notes, coach_notes).to_dict()
+
+def test_renders_sets_transitions_and_footnotes():
+    rows = [
+        play(1, song="Arcadia", transition=">"),
+        play(2, song="Hungersite", transition=",", footnote="With horns"),
+        play(3, song="Hot Tea", transition=","),
+        play(4, set_key="Encore", song="Arrow", transition="", footnote="Debut", shownotes="Happy New Year!"),
+    ]
+    state = IncrementalSetlist()
+    state.update(rows)
+    rendered = state.to_show(BASE_SHOW).to_dict()
+
+    assert rendered["sets"] == [
+        {"name": "Set 1", "songs": "Arcadia> Hungersite[1], Hot Tea"},
+        {"name": "Encore", "songs": "Arrow[2]"},
+    ]
+    assert rendered["coach_notes"] == [{"number": "1", "text": "With horns"}, {"number": "2", "text": "Debut"}]
+    assert rendered["notes"] == "Happy New Year!"
+    assert rendered == full_rebuild(rows)
+
+def test_empty_setlist_keeps_base_show():
+    state = IncrementalSetlist()
+    assert state.update([]) == []
+    rendered = state.to_show(BASE_SHOW).to_dict()
+    assert rendered["sets"] == [] and rendered["notes"] is None and rendered["coach_notes"] == []
+    assert BASE_SHOW.sets == []
+
+def test_deltas_report_only_new_songs():
+    state = IncrementalSetlist()
+    first = state.update([play(1, song="Arcadia", transition="")])
+    assert [delta.describe() for delta in first] == ["New song: Arcadia opens Set 1"]
+
+    # The transition of the last song is filled in once the next song is entered
+    second = state.update([play(1, song="Arcadia", transition=">"), play(2, song="Hungersite", transition="")])
+    assert [delta.describe() for delta in second] == ["New song: Arcadia > Hungersite in Set 1"]
+
+    assert state.update([play(1, song="Arcadia", transition=">"), play(2, song="Hungersite", transition="")]) == []
+
+def test_resume_does_not_report_checkpointed_rows_again():
+    rows = [play(1, song="Arcadia"), play(2, song="Hungersite")]
+    state = IncrementalSetlist()
+    state.resume([1, 2])
+    deltas = state.update(rows + [play(3, song="Hot Tea", transition="")])
+    assert [delta.song for delta in deltas] == ["Hot Tea"]
+    assert state.to_show(BASE_SHOW).to_dict() == full_rebuild(rows + [play(3, song="Hot Tea", transition="")])
+
+@pytest.mark.parametrize("seed", range(25))
+def test_incremental_updates_match_full_rebuild(seed):
+    """Appends, edits, reorders and removals between polls never make the state drift from a rebuild."""
+    rng = random.Random(seed)
+    state = IncrementalSetlist()
+    rows = []
+    seen_keys = set()
+    next_id = 1
+    for _ in range(60):
+        operation = rng.choice(["append", "append", "append", "edit", "reorder", "remove"])
+        if operation == "append" or not rows:
+            for _ in range(rng.randint(1, 3)):
+                rows.append(random_play(rng, next_id))
+                next_id += 1
+        elif operation == "edit":
+            index = rng.randrange(len(rows))
+            edited = random_play(rng, rows[index].uniqueid)
+            if rng.random() < 0.5:
+                # Often only the transition or footnote of a row changes
+                edited = play(rows[index].uniqueid, rows[index].set_key, rows[index].song_name,
+                              edited.transition, edited.footnote, rows[index].shownotes)
+            rows[index] = edited
+        elif operation == "reorder":
+            first, second = rng.randrange(len(rows)), rng.randrange(len(rows))
+            rows[first], rows[second] = rows[second], rows[first]
+        else:
+            del rows[rng.randrange(len(rows))]
+
+        deltas = state.update(list(rows))
+        assert state.to_show(BASE_SHOW).to_dict() == full_rebuild(rows)
+        assert state.processed_keys() == [row.key for row in rows]
+        # Only songs never seen before are reported, however often earlier rows were rewound
+        assert len(deltas) == len([row for row in rows if row.key not in seen_keys])
+        seen_keys.update(row.key for row in rows)
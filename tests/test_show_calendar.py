@@ -0,0 +1,79 @@
+import asyncio
+import datetime
+from models import Show
+from show_calendar import ScheduledShow, ShowDayScheduler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeTracker:
+    is_running = False
+    show_date = None
+
+def run_show_day(scheduler: ShowDayScheduler, clock: FakeClock, scheduled: ScheduledShow, until: float):
+    """Steps the scheduler's run loop on the fake clock without sleeping."""
+    while clock.now < until:
+        if scheduler._refresh_due(scheduled, clock.now):
+            asyncio.run(scheduler._refresh(scheduled))
+        clock.now += scheduler._next_wakeup(clock.now)
+
+def test_refreshes_fit_the_live_budget_and_pause_while_tracked():
+    show = Show.from_api({"show_id": 1, "showdate": "2026-10-17", "venuename": "MSG", "location": "New York, NY"})
+    clock, tracker, fetches = FakeClock(), FakeTracker(), []
+
+    async def show_fetcher(show_id, date, refresh=False, live=False):
+        fetches.append((clock.now, refresh, live))
+
+    scheduler = ShowDayScheduler(None, tracker, show_fetcher, channel_ids=[], start_time="19:00",
+                                 refresh_seconds=45, request_budget_per_hour=120, clock=clock)
+    scheduled = ScheduledShow(show, datetime.time(19, 0))
+    scheduler.schedule = [scheduled]
+    clock.now = scheduled.prewarm_at
+    scheduler._calendar_loaded_at = clock.now
+
+    run_show_day(scheduler, clock, scheduled, scheduled.starts_at)
+    # Two requests per refresh at 120 an hour leaves one refresh a minute
+    assert scheduler.refresh_seconds == 60
+    assert all(refresh and live for _, refresh, live in fetches)
+    assert len(fetches) <= (scheduled.starts_at - scheduled.prewarm_at) / 60 + 1
+
+    tracker.is_running, tracker.show_date = True, show.showdate
+    refreshes_before = len(fetches)
+    run_show_day(scheduler, clock, scheduled, scheduled.starts_at + 3600)
+    assert len(fetches) == refreshes_before
+
+    tracker.is_running = False
+    run_show_day(scheduler, clock, scheduled, scheduled.starts_at + 2 * 3600)
+    assert len(fetches) > refreshes_before
+
+def test_auto_start_looks_up_the_guild_of_uncached_channels():
+    class FakeGuild:
+        id = 7
+
+    class FakeChannel:
+        guild = FakeGuild()
+
+    class FakeBot:
+        def get_channel(self, channel_id):
+            return None
+
+        async def fetch_channel(self, channel_id):
+            return FakeChannel()
+
+    class StartRecorder(FakeTracker):
+        def __init__(self):
+            self.started = []
+
+        async def start(self, channel_id, guild_id, show_date):
+            self.started.append((channel_id, guild_id, show_date))
+            return "started"
+
+    show = Show.from_api({"show_id": 1, "showdate": "2026-10-17", "venuename": "MSG", "location": "New York, NY"})
+    tracker = StartRecorder()
+    scheduler = ShowDayScheduler(FakeBot(), tracker, None, channel_ids=[42])
+    asyncio.run(scheduler._start(ScheduledShow(show, datetime.time(19, 0))))
+    assert tracker.started == [(42, 7, "2026-10-17")]
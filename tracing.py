@@ -0,0 +1,313 @@
+import asyncio
+import contextvars
+import logging
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import List, Optional
+import aiohttp
+import json_codec
+from config import (
+    TRACING_ENABLED,
+    TRACE_SAMPLE_RATE,
+    TRACE_SLOW_SECONDS,
+    TRACE_RECENT_SIZE,
+    TRACE_EXPORTER,
+    TRACE_JSONL_PATH,
+    TRACE_OTLP_ENDPOINT,
+    TRACE_OTLP_FLUSH_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# The span the running task is inside; asyncio tasks inherit it from the code that created them
+_current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+class Span:
+    """One timed step of a trace, with free-form attributes."""
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'attributes', 'start_time', '_started', 'duration', 'error')
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: dict):
+        self.trace = trace
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+class _NoopSpan:
+    """Stands in for a span while tracing is disabled."""
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class Trace:
+    """All spans of one interaction or poll, rooted at the first span opened outside any other."""
+    __slots__ = ('trace_id', 'sampled', 'spans', 'finished')
+
+    def __init__(self, sampled: bool):
+        self.trace_id = _new_id(128)
+        self.sampled = sampled
+        self.spans: List[Span] = []
+        self.finished = False
+
+    @property
+    def root(self) -> Span:
+        return self.spans[0]
+
+    @property
+    def duration(self) -> float:
+        return self.root.duration or 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "duration_ms": round(self.duration * 1000, 3),
+            "spans": [span.to_dict() for span in self.spans],
+        }
+
+class JSONLExporter:
+    """Appends each exported trace to a local file as one JSON line."""
+
+    def __init__(self, path: str = TRACE_JSONL_PATH):
+        self.path = path
+        self._file = None
+
+    async def start(self):
+        pass
+
+    def export(self, trace: Trace):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json_codec.dumps(trace.to_dict()) + "\n")
+        self._file.flush()
+
+    async def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otlp_span(span: Span) -> dict:
+    start_ns = int(span.start_time * 1e9)
+    otlp_span = {
+        "traceId": span.trace.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(start_ns),
+        "endTimeUnixNano": str(start_ns + int((span.duration or 0.0) * 1e9)),
+        "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        otlp_span["parentSpanId"] = span.parent_id
+    return otlp_span
+
+class OTLPExporter:
+    """
+    Sends traces to an OTLP/HTTP collector as JSON (POST /v1/traces),
+    batched every flush_seconds. Traces that can't be delivered are dropped.
+    """
+
+    def __init__(self, endpoint: str = TRACE_OTLP_ENDPOINT, flush_seconds: float = TRACE_OTLP_FLUSH_SECONDS,
+                 service_name: str = "elgoose-bot", max_queue: int = 1000):
+        self.endpoint = endpoint
+        self.flush_seconds = flush_seconds
+        self.service_name = service_name
+        self._queue: deque = deque(maxlen=max_queue)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self.exported = 0
+        self.failed = 0
+
+    async def start(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5))
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    def export(self, trace: Trace):
+        self._queue.append(trace)
+
+    def _payload(self, traces: List[Trace]) -> dict:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "elgoose-bot"},
+                "spans": [_otlp_span(span) for trace in traces for span in trace.spans],
+            }],
+        }]}
+
+    async def flush(self):
+        if not self._queue or self._session is None:
+            return
+        traces = list(self._queue)
+        self._queue.clear()
+        try:
+            async with self._session.post(
+                self.endpoint, data=json_codec.dumps(self._payload(traces)),
+                headers={'Content-Type': 'application/json'},
+            ) as response:
+                if response.status >= 300:
+                    raise aiohttp.ClientResponseError(
+                        response.request_info, response.history, status=response.status
+                    )
+            self.exported += len(traces)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.failed += len(traces)
+            logger.warning("Could not export %d trace(s) to %s: %s", len(traces), self.endpoint, e)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    async def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+def create_exporter(kind: str = TRACE_EXPORTER):
+    """The exporter named by TRACE_EXPORTER ('jsonl', 'otlp'), or None to keep traces in memory only."""
+    if kind == 'jsonl':
+        return JSONLExporter()
+    if kind == 'otlp':
+        return OTLPExporter()
+    if kind:
+        logger.warning("Unknown TRACE_EXPORTER '%s'; traces are kept in memory only", kind)
+    return None
+
+class Tracer:
+    """
+    Lightweight in-process tracer.
+
+    `with tracer.span(name)` times a block. A span opened while no other span
+    is active (or with new_trace=True) starts a new trace; the current span
+    is tracked in a context variable, so spans opened in awaited code and in
+    tasks created inside a span join the same trace.
+
+    Traces are exported when sampled (TRACE_SAMPLE_RATE, decided when the
+    trace starts) or when they take at least TRACE_SLOW_SECONDS, and the most
+    recent traces stay in memory for /trace.
+    """
+
+    def __init__(self, enabled: bool = TRACING_ENABLED, sample_rate: float = TRACE_SAMPLE_RATE,
+                 slow_seconds: float = TRACE_SLOW_SECONDS, recent_size: int = TRACE_RECENT_SIZE, exporter=None):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+        self.exporter = exporter
+        self.recent: deque = deque(maxlen=recent_size)
+        self.traces = 0
+        self.slow_traces = 0
+        self.exported = 0
+
+    def stats(self) -> dict:
+        return {"traces": self.traces, "slow_traces": self.slow_traces, "exported": self.exported}
+
+    async def start(self):
+        if self.exporter is not None:
+            await self.exporter.start()
+
+    async def close(self):
+        if self.exporter is not None:
+            await self.exporter.close()
+
+    @contextmanager
+    def span(self, name: str, new_trace: bool = False, **attributes):
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        parent = None if new_trace else _current_span.get()
+        trace = parent.trace if parent is not None else Trace(random.random() < self.sample_rate)
+        span = Span(trace, name, parent.span_id if parent is not None else None, attributes)
+        trace.spans.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = "cancelled" if isinstance(e, asyncio.CancelledError) else f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration = time.perf_counter() - span._started
+            _current_span.reset(token)
+            if parent is None:
+                self._finish(trace)
+
+    @contextmanager
+    def child_span(self, name: str, **attributes):
+        """Like span(), but only inside an existing trace; outside one (e.g. background refreshes) it is a no-op."""
+        if _current_span.get() is None:
+            yield _NOOP_SPAN
+            return
+        with self.span(name, **attributes) as span:
+            yield span
+
+    def _finish(self, trace: Trace):
+        # Spans of tasks that outlive the root (e.g. pager prefetches) still land in trace.spans, unexported.
+        trace.finished = True
+        self.traces += 1
+        self.recent.append(trace)
+        slow = trace.duration >= self.slow_seconds
+        if slow:
+            self.slow_traces += 1
+        if self.exporter is not None and (trace.sampled or slow):
+            try:
+                self.exporter.export(trace)
+                self.exported += 1
+            except Exception as e:
+                logger.warning("Trace export failed: %s", e)
+
+    def slowest_recent(self, count: int = 3) -> List[Trace]:
+        """The most recent traces that took at least TRACE_SLOW_SECONDS, newest first."""
+        return [trace for trace in reversed(self.recent) if trace.duration >= self.slow_seconds][:count]
+
+def current_span():
+    """The active span, or a no-op stand-in outside any span, for attaching attributes."""
+    span = _current_span.get()
+    return span if span is not None else _NOOP_SPAN
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace.trace_id if span is not None else None
+
+# Shared tracer; start() is awaited during bot setup so the exporter can open its session
+tracer = Tracer(exporter=create_exporter())